@@ -1,36 +1,67 @@
-from sqlalchemy import create_engine
+from typing import AsyncIterator
+from fastapi import Request
+from sqlalchemy import text
+from sqlalchemy.ext.asyncio import AsyncConnection, AsyncEngine, AsyncSession, async_sessionmaker, create_async_engine
 from sqlalchemy.ext.declarative import declarative_base
-from sqlalchemy.orm import sessionmaker
 from app.config import settings
 import logging
 
 logger = logging.getLogger(__name__)
 
-# Create engine with connection pooling
-engine = create_engine(
-    settings.DATABASE_URL,
-    echo=settings.DEBUG,
-    pool_size=10,
-    max_overflow=20,
-    pool_pre_ping=True,  # Test connections before using
-)
-
-# Session factory
-SessionLocal = sessionmaker(
-    autocommit=False,
-    autoflush=False,
-    bind=engine
-)
-
 # Base class for all models
 Base = declarative_base()
 
-# Dependency for FastAPI
-def get_db():
-    db = SessionLocal()
-    try:
-        yield db
-    finally:
-        db.close()
+# Tables whose UUID primary keys default to gen_random_uuid()
+UUID_PK_TABLES = ("users", "companies", "jobs", "candidates", "applications")
+
+def build_engine() -> AsyncEngine:
+    """Create async engine with connection pooling (called from app lifespan)"""
+    engine = create_async_engine(
+        settings.DATABASE_URL,
+        echo=settings.DEBUG,
+        pool_size=20,
+        max_overflow=10,
+        pool_pre_ping=True,  # Test connections before using
+    )
+    logger.info("✅ Database engine created")
+    return engine
+
+def build_sessionmaker(engine: AsyncEngine) -> async_sessionmaker:
+    """Session factory bound to the given engine"""
+    return async_sessionmaker(
+        bind=engine,
+        autoflush=False,
+        expire_on_commit=False,
+    )
+
+async def init_schema(conn: AsyncConnection):
+    """Create missing tables and add id defaults that create_all can't add to existing ones"""
+    # gen_random_uuid() is built in from PG13; older servers need pgcrypto
+    version = (await conn.execute(text("SHOW server_version_num"))).scalar_one()
+    if int(version) < 130000:
+        await conn.execute(text("CREATE EXTENSION IF NOT EXISTS pgcrypto"))
 
-logger.info("✅ Database connection configured")
+    await conn.run_sync(Base.metadata.create_all)
+
+    # Tables created before ids moved to the database have no column default
+    missing = (
+        await conn.execute(
+            text(
+                "SELECT table_name FROM information_schema.columns "
+                "WHERE table_schema = current_schema() AND column_name = 'id' "
+                "AND column_default IS NULL AND table_name = ANY(:tables)"
+            ),
+            {"tables": list(UUID_PK_TABLES)}
+        )
+    ).scalars().all()
+    for table in missing:
+        await conn.execute(text(f"ALTER TABLE {table} ALTER COLUMN id SET DEFAULT gen_random_uuid()"))
+        logger.info(f"✅ Added gen_random_uuid() default to {table}.id")
+
+# Dependencies for FastAPI
+def get_session_factory(request: Request) -> async_sessionmaker:
+    return request.app.state.SessionLocal
+
+async def get_db(request: Request) -> AsyncIterator[AsyncSession]:
+    async with request.app.state.SessionLocal() as db:
+        yield db
@@ -0,0 +1,21 @@
+from fastapi import Depends, HTTPException, status
+from fastapi.security import HTTPAuthorizationCredentials, HTTPBearer
+
+from app.utils.jwt_handler import JWTHandler
+
+bearer_scheme = HTTPBearer()
+
+
+def get_current_user_id(
+    credentials: HTTPAuthorizationCredentials = Depends(bearer_scheme)
+) -> str:
+    """User id from the access token in the Authorization header"""
+    payload = JWTHandler.verify_token(credentials.credentials)
+    # Refresh tokens are only accepted by /auth/refresh
+    if not payload or payload.get("type") == "refresh" or not payload.get("sub"):
+        raise HTTPException(
+            status_code=status.HTTP_401_UNAUTHORIZED,
+            detail="Invalid or expired token",
+            headers={"WWW-Authenticate": "Bearer"}
+        )
+    return payload["sub"]
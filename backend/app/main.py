@@ -1,34 +1,57 @@
 from fastapi import FastAPI, Request
 from fastapi.middleware.cors import CORSMiddleware
-from fastapi.responses import JSONResponse
+from fastapi.middleware.gzip import GZipMiddleware
+from fastapi.responses import JSONResponse, ORJSONResponse
 import logging
+import sys
 from contextlib import asynccontextmanager
 
 from app.config import settings
-from app.database import engine, Base
+from app.database import build_engine, build_sessionmaker, init_schema
+from app.services.cache_service import CacheService
+from app.services.embedding_service import EmbeddingService
+from app.services.faiss_service import FAISSService
 from app.routers import auth, jobs, candidates, embeddings
 
 # Setup logging
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
-# Create database tables on startup
+# Open shared resources on startup and release them on shutdown
 @asynccontextmanager
 async def lifespan(app: FastAPI):
     # Startup
+    engine = build_engine()
+    app.state.engine = engine
+    app.state.SessionLocal = build_sessionmaker(engine)
+
     logger.info("Creating database tables...")
-    Base.metadata.create_all(bind=engine)
+    async with engine.begin() as conn:
+        await init_schema(conn)
     logger.info("✅ Database tables created")
+
+    await FAISSService.initialize_async()
+    FAISSService.start_flusher()
+    EmbeddingService.warmup()
+    EmbeddingService.start_batcher()
+
     yield
+
     # Shutdown
     logger.info("Shutting down...")
+    await EmbeddingService.stop_batcher()
+    await FAISSService.stop_flusher()
+    FAISSService.persist()
+    await CacheService.close()
+    await app.state.engine.dispose()
 
 # Initialize FastAPI app
 app = FastAPI(
     title="TalentIQ API",
     description="AI-Powered Recruitment Platform",
     version="0.1.0",
-    lifespan=lifespan
+    lifespan=lifespan,
+    default_response_class=ORJSONResponse
 )
 
 # CORS Middleware
@@ -40,6 +63,9 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+# Compress larger JSON payloads (search results, embeddings) for clients that accept gzip
+app.add_middleware(GZipMiddleware, minimum_size=1024, compresslevel=5)
+
 # Custom exception handler
 @app.exception_handler(Exception)
 async def global_exception_handler(request: Request, exc: Exception):
@@ -75,4 +101,14 @@ async def root():
 
 if __name__ == "__main__":
     import uvicorn
-    uvicorn.run(app, host="0.0.0.0", port=8000)
+    # A single writer process owns the FAISS index and metadata store; see settings.WORKERS
+    if settings.WORKERS > 1:
+        logger.warning("⚠️ Multiple workers each write their own copy of the FAISS index")
+    uvicorn.run(
+        "app.main:app",
+        host="0.0.0.0",
+        port=8000,
+        workers=settings.WORKERS,
+        loop="uvloop" if sys.platform != "win32" else "auto",
+        http="httptools"
+    )
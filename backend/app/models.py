@@ -1,15 +1,14 @@
-from sqlalchemy import Column, String, Integer, Boolean, DateTime, ForeignKey, JSON, Numeric, Text
+from sqlalchemy import Column, String, Integer, Boolean, DateTime, ForeignKey, Index, JSON, Numeric, Text, text
 from sqlalchemy.dialects.postgresql import UUID
 from sqlalchemy.orm import relationship
 from datetime import datetime
-import uuid
 
 from app.database import Base
 
 class User(Base):
     __tablename__ = "users"
 
-    id = Column(UUID(as_uuid=True), primary_key=True, default=uuid.uuid4)
+    id = Column(UUID(as_uuid=True), primary_key=True, server_default=text("gen_random_uuid()"))
     name = Column(String(255), nullable=False)
     email = Column(String(255), unique=True, nullable=False, index=True)
     password_hash = Column(String(255), nullable=False)
@@ -32,7 +31,7 @@ class User(Base):
 class Company(Base):
     __tablename__ = "companies"
 
-    id = Column(UUID(as_uuid=True), primary_key=True, default=uuid.uuid4)
+    id = Column(UUID(as_uuid=True), primary_key=True, server_default=text("gen_random_uuid()"))
     name = Column(String(255), nullable=False)
     verified = Column(Boolean, default=False)
     plan = Column(String(50), default="free")  # free, pro, enterprise
@@ -50,8 +49,13 @@ class Company(Base):
 
 class Job(Base):
     __tablename__ = "jobs"
+    __table_args__ = (
+        # Serves the open-jobs list, which pages by id
+        Index("ix_jobs_open", "id", postgresql_where=text("status = 'open'")),
+        Index("ix_jobs_company_status", "company_id", "status"),
+    )
 
-    id = Column(UUID(as_uuid=True), primary_key=True, default=uuid.uuid4)
+    id = Column(UUID(as_uuid=True), primary_key=True, server_default=text("gen_random_uuid()"))
     company_id = Column(UUID(as_uuid=True), ForeignKey("companies.id"), nullable=False)
     title = Column(String(255), nullable=False)
     jd_text = Column(Text)
@@ -75,7 +79,7 @@ class Job(Base):
 class Candidate(Base):
     __tablename__ = "candidates"
 
-    id = Column(UUID(as_uuid=True), primary_key=True, default=uuid.uuid4)
+    id = Column(UUID(as_uuid=True), primary_key=True, server_default=text("gen_random_uuid()"))
     user_id = Column(UUID(as_uuid=True), ForeignKey("users.id"), nullable=False, unique=True)
     parsed_profile = Column(JSON, default={})  # structured resume data
     resume_url = Column(String(255))
@@ -93,12 +97,15 @@ class Candidate(Base):
 
 class Application(Base):
     __tablename__ = "applications"
+    __table_args__ = (
+        Index("ix_app_job_fit", "job_id", text("fit_score DESC")),
+    )
 
-    id = Column(UUID(as_uuid=True), primary_key=True, default=uuid.uuid4)
+    id = Column(UUID(as_uuid=True), primary_key=True, server_default=text("gen_random_uuid()"))
     job_id = Column(UUID(as_uuid=True), ForeignKey("jobs.id"), nullable=False)
-    candidate_id = Column(UUID(as_uuid=True), ForeignKey("candidates.id"), nullable=False)
+    candidate_id = Column(UUID(as_uuid=True), ForeignKey("candidates.id"), nullable=False, index=True)
     source = Column(String(50), default="upload")  # upload, email, passive, referral
-    fit_score = Column(Numeric(3, 2), default=0.0)
+    fit_score = Column(Numeric(3, 2, asdecimal=False), default=0.0)
     rank = Column(Integer)
     status = Column(String(50), default="applied")  # applied, reviewed, interview, offer, hired, rejected
     created_at = Column(DateTime, default=datetime.utcnow)
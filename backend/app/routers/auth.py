@@ -1,10 +1,15 @@
 from fastapi import APIRouter, Depends, HTTPException, status
-from sqlalchemy.orm import Session
-from pydantic import BaseModel, EmailStr
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker
+from pydantic import AfterValidator, BaseModel, StringConstraints
+from typing import Annotated, NamedTuple, Optional
 from passlib.context import CryptContext
+from async_lru import alru_cache
+import asyncio
 import logging
+import uuid
 
-from app.database import get_db
+from app.database import get_db, get_session_factory
 from app.models import User, Company
 from app.utils.jwt_handler import JWTHandler
 
@@ -15,15 +20,29 @@ router = APIRouter()
 # Password hashing
 pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
 
+# Cheap shape check instead of full RFC parsing via email-validator
+EMAIL_PATTERN = r"^[^@\s]+@[^@\s]+\.[^@\s]+$"
+
+def normalize_email(email: str) -> str:
+    """Lowercase the domain, as EmailStr did, so stored addresses still match"""
+    local, _, domain = email.rpartition("@")
+    return f"{local}@{domain.lower()}"
+
+EmailAddress = Annotated[
+    str,
+    StringConstraints(strip_whitespace=True, max_length=254, pattern=EMAIL_PATTERN),
+    AfterValidator(normalize_email)
+]
+
 # Schemas
 class RegisterRequest(BaseModel):
     name: str
-    email: EmailStr
+    email: EmailAddress
     password: str
     role: str = "candidate"  # candidate, recruiter, admin
 
 class LoginRequest(BaseModel):
-    email: EmailStr
+    email: EmailAddress
     password: str
 
 class TokenResponse(BaseModel):
@@ -36,19 +55,47 @@ class RefreshTokenRequest(BaseModel):
     refresh_token: str
 
 # Helper functions
-def hash_password(password: str) -> str:
-    return pwd_context.hash(password)
+# bcrypt is deliberately slow, so run it in a worker thread to keep the event loop free
+async def hash_password(password: str) -> str:
+    return await asyncio.to_thread(pwd_context.hash, password)
 
-def verify_password(plain_password: str, hashed_password: str) -> bool:
-    return pwd_context.verify(plain_password, hashed_password)
+async def verify_password(plain_password: str, hashed_password: str) -> bool:
+    return await asyncio.to_thread(pwd_context.verify, plain_password, hashed_password)
+
+class CachedUser(NamedTuple):
+    id: uuid.UUID
+    email: str
+    name: str
+    role: str
+    is_active: bool
+
+# Refresh is called by every open tab, so keep recently seen users briefly in memory;
+# the short TTL bounds how long a deactivated account can keep refreshing
+@alru_cache(maxsize=10000, ttl=30)
+async def fetch_user(user_id: str, SessionLocal: async_sessionmaker) -> Optional[CachedUser]:
+    try:
+        user_uuid = uuid.UUID(user_id)
+    except (TypeError, ValueError):
+        return None
+
+    async with SessionLocal() as db:
+        row = (
+            await db.execute(
+                select(User.id, User.email, User.name, User.role, User.is_active)
+                .where(User.id == user_uuid)
+            )
+        ).one_or_none()
+    return CachedUser(*row) if row else None
 
 # Endpoints
 @router.post("/register", response_model=TokenResponse)
-async def register(request: RegisterRequest, db: Session = Depends(get_db)):
+async def register(request: RegisterRequest, db: AsyncSession = Depends(get_db)):
     """Register a new user"""
     
     # Check if user exists
-    existing_user = db.query(User).filter(User.email == request.email).first()
+    existing_user = (
+        await db.execute(select(User).where(User.email == request.email))
+    ).scalar_one_or_none()
     if existing_user:
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST,
@@ -60,30 +107,30 @@ async def register(request: RegisterRequest, db: Session = Depends(get_db)):
     if request.role == "recruiter":
         company = Company(name=f"{request.name}'s Company")
         db.add(company)
-        db.flush()
+        await db.flush()
 
     # Create user
     user = User(
         name=request.name,
         email=request.email,
-        password_hash=hash_password(request.password),
+        password_hash=await hash_password(request.password),
         role=request.role,
         company_id=company.id if company else None
     )
 
     db.add(user)
-    db.commit()
-    db.refresh(user)
+    await db.commit()
+    await db.refresh(user)
 
     logger.info(f"✅ User registered: {user.email}")
 
     # Generate tokens
-    tokens = JWTHandler.create_tokens(str(user.id), user.email)
+    tokens = JWTHandler.create_tokens(user.id, user.email)
 
     return {
         **tokens,
         "user": {
-            "id": str(user.id),
+            "id": user.id,
             "name": user.name,
             "email": user.email,
             "role": user.role
@@ -91,12 +138,14 @@ async def register(request: RegisterRequest, db: Session = Depends(get_db)):
     }
 
 @router.post("/login", response_model=TokenResponse)
-async def login(request: LoginRequest, db: Session = Depends(get_db)):
+async def login(request: LoginRequest, db: AsyncSession = Depends(get_db)):
     """Login user"""
     
     # Find user
-    user = db.query(User).filter(User.email == request.email).first()
-    if not user or not verify_password(request.password, user.password_hash):
+    user = (
+        await db.execute(select(User).where(User.email == request.email))
+    ).scalar_one_or_none()
+    if not user or not await verify_password(request.password, user.password_hash):
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
             detail="Invalid credentials"
@@ -111,12 +160,12 @@ async def login(request: LoginRequest, db: Session = Depends(get_db)):
     logger.info(f"✅ User logged in: {user.email}")
 
     # Generate tokens
-    tokens = JWTHandler.create_tokens(str(user.id), user.email)
+    tokens = JWTHandler.create_tokens(user.id, user.email)
 
     return {
         **tokens,
         "user": {
-            "id": str(user.id),
+            "id": user.id,
             "name": user.name,
             "email": user.email,
             "role": user.role
@@ -124,7 +173,10 @@ async def login(request: LoginRequest, db: Session = Depends(get_db)):
     }
 
 @router.post("/refresh", response_model=TokenResponse)
-async def refresh_token(request: RefreshTokenRequest, db: Session = Depends(get_db)):
+async def refresh_token(
+    request: RefreshTokenRequest,
+    SessionLocal: async_sessionmaker = Depends(get_session_factory)
+):
     """Refresh access token"""
     
     # Verify refresh token
@@ -137,20 +189,26 @@ async def refresh_token(request: RefreshTokenRequest, db: Session = Depends(get_
 
     # Get user
     user_id = payload.get("sub")
-    user = db.query(User).filter(User.id == user_id).first()
+    user = await fetch_user(user_id, SessionLocal)
     if not user:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
             detail="User not found"
         )
 
+    if not user.is_active:
+        raise HTTPException(
+            status_code=status.HTTP_403_FORBIDDEN,
+            detail="User account is inactive"
+        )
+
     # Generate new tokens
-    tokens = JWTHandler.create_tokens(str(user.id), user.email)
+    tokens = JWTHandler.create_tokens(user.id, user.email)
 
     return {
         **tokens,
         "user": {
-            "id": str(user.id),
+            "id": user.id,
             "name": user.name,
             "email": user.email,
             "role": user.role
@@ -1,16 +1,36 @@
-from fastapi import APIRouter, Depends, HTTPException, File, UploadFile
-from sqlalchemy.orm import Session
+from fastapi import APIRouter, Depends, HTTPException, File, UploadFile, Query
+from sqlalchemy.ext.asyncio import AsyncSession
 from pydantic import BaseModel
 from typing import List
 import logging
 
 from app.database import get_db
+from app.dependencies import get_current_user_id
 from app.models import Candidate, User
 from app.services.cloudinary_service import CloudinaryService
 
 logger = logging.getLogger(__name__)
 router = APIRouter()
 
+# Leading bytes expected for each accepted resume content type
+RESUME_SIGNATURES = {
+    "application/pdf": (b"%PDF-",),
+    "application/msword": (b"\xd0\xcf\x11\xe0\xa1\xb1\x1a\xe1",),
+    "application/vnd.openxmlformats-officedocument.wordprocessingml.document": (b"PK\x03\x04",),
+    "image/jpeg": (b"\xff\xd8\xff",),
+    "image/png": (b"\x89PNG\r\n\x1a\n",),
+}
+# Plain text has no signature; it is only checked for NUL bytes
+ALLOWED_RESUME_TYPES = frozenset(RESUME_SIGNATURES) | {"text/plain"}
+SIGNATURE_READ_SIZE = 8
+
+def matches_signature(content_type: str, head: bytes) -> bool:
+    """Check the first bytes of an upload against its declared content type"""
+    signatures = RESUME_SIGNATURES.get(content_type)
+    if signatures is None:
+        return b"\x00" not in head
+    return head.startswith(signatures)
+
 # Schemas
 class CandidateProfile(BaseModel):
     name: str
@@ -26,7 +46,7 @@ class ResumeUploadResponse(BaseModel):
 
 # Endpoints
 @router.get("/profile")
-async def get_profile(db: Session = Depends(get_db)):
+async def get_profile(db: AsyncSession = Depends(get_db)):
     """Get candidate profile"""
     # TODO: Add auth check
     return {"message": "Profile endpoint - Week 2"}
@@ -34,7 +54,7 @@ async def get_profile(db: Session = Depends(get_db)):
 @router.post("/upload-resume", response_model=ResumeUploadResponse)
 async def upload_resume(
     file: UploadFile = File(...),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_db)
 ):
     """
     Upload resume to Cloudinary
@@ -43,26 +63,26 @@ async def upload_resume(
     """
     try:
         # Validate file type
-        allowed_types = [
-            "application/pdf",
-            "application/msword",
-            "application/vnd.openxmlformats-officedocument.wordprocessingml.document",
-            "text/plain",
-            "image/jpeg",
-            "image/png"
-        ]
-        
-        if file.content_type not in allowed_types:
+        if file.content_type not in ALLOWED_RESUME_TYPES:
             raise HTTPException(
                 status_code=400,
                 detail=f"File type not supported. Allowed: PDF, DOC, DOCX, TXT, JPG, PNG"
             )
+
+        # The header is client-controlled, so check the file really starts as declared
+        head = await file.read(SIGNATURE_READ_SIZE)
+        await file.seek(0)
+        if not matches_signature(file.content_type, head):
+            raise HTTPException(
+                status_code=400,
+                detail="File content does not match its declared type"
+            )
         
         # TODO: Get user_id from auth token
         user_id = "test_user"
         
         # Upload to Cloudinary
-        result = CloudinaryService.upload_resume(file, user_id)
+        result = await CloudinaryService.upload_resume(file, user_id)
         
         logger.info(f"✅ Resume uploaded: {result['url']}")
         
@@ -79,8 +99,22 @@ async def upload_resume(
         logger.error(f"❌ Upload failed: {str(e)}")
         raise HTTPException(status_code=400, detail=f"Upload failed: {str(e)}")
 
+@router.get("/upload-signature")
+async def get_upload_signature(
+    resource_type: str = Query("video", pattern="^(video|image)$"),
+    user_id: str = Depends(get_current_user_id)
+):
+    """
+    Sign a direct upload so large media goes from the browser straight to Cloudinary
+    
+    The client posts the file and the returned fields to upload_url and gets
+    secure_url back from Cloudinary directly. Requires an access token; the
+    signature only covers the caller's own public_id.
+    """
+    return CloudinaryService.get_upload_signature(user_id, resource_type)
+
 @router.get("/recommendations")
-async def get_recommendations(db: Session = Depends(get_db)):
+async def get_recommendations(db: AsyncSession = Depends(get_db)):
     """Get job recommendations"""
     # TODO: Implement matching logic
     return {"message": "Recommendations - Week 2"}
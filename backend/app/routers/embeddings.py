@@ -1,62 +1,71 @@
-from fastapi import APIRouter, HTTPException
-from pydantic import BaseModel
+from fastapi import APIRouter, Depends, HTTPException
+from typing import Optional
+import msgspec
+import asyncio
 import logging
 
+from app.services.cache_service import CacheService
 from app.services.embedding_service import EmbeddingService
 from app.services.faiss_service import FAISSService
-
-# Initialize FAISS on startup
-FAISSService.initialize()
+from app.utils.msgspec_utils import msgspec_body, msgspec_response
 
 logger = logging.getLogger(__name__)
 router = APIRouter()
 
 # Schemas
-class EmbeddingRequest(BaseModel):
+class EmbeddingRequest(msgspec.Struct):
     text: str
 
-class SearchRequest(BaseModel):
+class SearchRequest(msgspec.Struct):
     query_text: str
     n_results: int = 10
 
-class AddResumeRequest(BaseModel):
+class AddResumeRequest(msgspec.Struct):
     resume_id: str
     resume_text: str
-    metadata: dict = None
+    metadata: Optional[dict] = None
 
 # Endpoints
 @router.post("/generate-embedding")
-async def generate_embedding(request: EmbeddingRequest):
+async def generate_embedding(request: EmbeddingRequest = Depends(msgspec_body(EmbeddingRequest))):
     """Generate embedding for text"""
     try:
-        embedding = EmbeddingService.generate_embedding(request.text)
-        if not embedding:
+        embedding = await EmbeddingService.embed_async(request.text)
+        if embedding is None:
             raise HTTPException(status_code=400, detail="Failed to generate embedding")
         
-        return {
+        return msgspec_response({
             "status": "success",
             "embedding_dimension": len(embedding),
-            "embedding": embedding[:10]  # Return first 10 for preview
-        }
+            "embedding": embedding[:10].tolist()  # Return first 10 for preview
+        })
     except Exception as e:
         logger.error(f"❌ Error: {str(e)}")
         raise HTTPException(status_code=400, detail=str(e))
 
 @router.post("/search-resumes")
-async def search_resumes(request: SearchRequest):
+async def search_resumes(request: SearchRequest = Depends(msgspec_body(SearchRequest))):
     """Search for similar resumes"""
     try:
-        # Generate embedding for query
-        query_embedding = EmbeddingService.generate_embedding(request.query_text)
-        if not query_embedding:
-            raise HTTPException(status_code=400, detail="Failed to generate query embedding")
+        # Query embedding from this process's caches, then Redis (shared with other
+        # processes), and only then the model
+        query_embedding = EmbeddingService.get_cached(request.query_text)
+        if query_embedding is None:
+            query_embedding = await CacheService.get_embedding(request.query_text)
+            if query_embedding is not None:
+                EmbeddingService.set_cached(request.query_text, query_embedding)
+            else:
+                query_embedding = await EmbeddingService.embed_async(request.query_text)
+                if query_embedding is None:
+                    raise HTTPException(status_code=400, detail="Failed to generate query embedding")
+                await CacheService.set_embedding(request.query_text, query_embedding)
         
         # Search in FAISS
-        results = FAISSService.search_resumes(query_embedding, request.n_results)
+        results = await FAISSService.search_resumes_async(query_embedding, request.n_results)
         if not results:
             raise HTTPException(status_code=400, detail="Search failed")
         
-        return {
+        return msgspec_response({
             "status": "success",
             "query": request.query_text,
             "results_count": len(results['ids']),
@@ -65,22 +74,22 @@ async def search_resumes(request: SearchRequest):
                 "documents": results['documents'],
                 "distances": results['distances']
             }
-        }
+        })
     except Exception as e:
         logger.error(f"❌ Error: {str(e)}")
         raise HTTPException(status_code=400, detail=str(e))
 
 @router.post("/add-resume")
-async def add_resume(request: AddResumeRequest):
+async def add_resume(request: AddResumeRequest = Depends(msgspec_body(AddResumeRequest))):
     """Add resume to FAISS"""
     try:
         # Generate embedding
-        embedding = EmbeddingService.generate_embedding(request.resume_text)
-        if not embedding:
+        embedding = await EmbeddingService.embed_async(request.resume_text)
+        if embedding is None:
             raise HTTPException(status_code=400, detail="Failed to generate embedding")
         
         # Add to FAISS
-        success = FAISSService.add_resume(
+        success = await FAISSService.add_resume_async(
             request.resume_id,
             request.resume_text,
             embedding,
@@ -90,11 +99,11 @@ async def add_resume(request: AddResumeRequest):
         if not success:
             raise HTTPException(status_code=400, detail="Failed to add resume")
         
-        return {
+        return msgspec_response({
             "status": "success",
             "resume_id": request.resume_id,
             "message": "Resume added successfully"
-        }
+        })
     except Exception as e:
         logger.error(f"❌ Error: {str(e)}")
         raise HTTPException(status_code=400, detail=str(e))
@@ -103,7 +112,7 @@ async def add_resume(request: AddResumeRequest):
 async def get_stats():
     """Get collection statistics"""
     try:
-        stats = FAISSService.get_collection_stats()
+        stats = await asyncio.to_thread(FAISSService.get_collection_stats)
         return {"status": "success", "stats": stats}
     except Exception as e:
         logger.error(f"❌ Error: {str(e)}")
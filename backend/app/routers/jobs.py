@@ -1,7 +1,8 @@
-from fastapi import APIRouter, Depends, HTTPException, status
-from sqlalchemy.orm import Session
+from fastapi import APIRouter, Depends, HTTPException, Query, status
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
 from pydantic import BaseModel
-from typing import List
+from typing import List, Optional
 import uuid
 
 from app.database import get_db
@@ -31,7 +32,7 @@ class JobResponse(BaseModel):
 
 # Endpoints
 @router.post("/", response_model=dict)
-async def create_job(job: JobCreate, db: Session = Depends(get_db)):
+async def create_job(job: JobCreate, db: AsyncSession = Depends(get_db)):
     """Create a new job posting"""
     # TODO: Add auth check for recruiter
     
@@ -47,21 +48,33 @@ async def create_job(job: JobCreate, db: Session = Depends(get_db)):
     )
 
     db.add(new_job)
-    db.commit()
-    db.refresh(new_job)
+    await db.commit()
+    await db.refresh(new_job)
 
-    return {"id": str(new_job.id), "title": new_job.title, "status": "created"}
+    return {"id": new_job.id, "title": new_job.title, "status": "created"}
 
 @router.get("/")
-async def list_jobs(db: Session = Depends(get_db)):
-    """List all jobs"""
-    jobs = db.query(Job).filter(Job.status == "open").all()
-    return {"jobs": [{"id": str(j.id), "title": j.title} for j in jobs]}
+async def list_jobs(
+    limit: int = Query(50, ge=1, le=200),
+    after: Optional[uuid.UUID] = None,
+    db: AsyncSession = Depends(get_db)
+):
+    """List open jobs, paginated by id (pass next_cursor as `after`)"""
+    query = select(Job.id, Job.title).where(Job.status == "open")
+    if after is not None:
+        query = query.where(Job.id > after)
+    rows = (await db.execute(query.order_by(Job.id).limit(limit))).all()
+
+    next_cursor = rows[-1].id if len(rows) == limit else None
+    return {
+        "jobs": [{"id": r.id, "title": r.title} for r in rows],
+        "next_cursor": next_cursor
+    }
 
 @router.get("/{job_id}")
-async def get_job(job_id: str, db: Session = Depends(get_db)):
+async def get_job(job_id: str, db: AsyncSession = Depends(get_db)):
     """Get job details"""
-    job = db.query(Job).filter(Job.id == job_id).first()
+    job = (await db.execute(select(Job.id, Job.title).where(Job.id == job_id))).one_or_none()
     if not job:
         raise HTTPException(status_code=404, detail="Job not found")
-    return {"id": str(job.id), "title": job.title}
+    return {"id": job.id, "title": job.title}
@@ -0,0 +1,63 @@
+import redis.asyncio as redis
+import numpy as np
+import hashlib
+import logging
+from typing import Optional
+
+from app.config import settings
+from app.services.embedding_service import CACHE_NAMESPACE
+
+logger = logging.getLogger(__name__)
+
+# Query embeddings are cached for an hour
+EMBEDDING_TTL_SECONDS = 3600
+
+# Connections are opened lazily on first command; the cache is optional, so an
+# unreachable or stalled Redis fails fast instead of holding up the search
+client = redis.from_url(
+    settings.REDIS_URL,
+    socket_connect_timeout=0.5,
+    socket_timeout=0.5
+)
+
+
+class CacheService:
+    """Service for sharing query embeddings between processes via Redis"""
+
+    @staticmethod
+    def _embedding_key(text: str) -> str:
+        # Stored as float32, the same values the local caches hold
+        return "emb:f32:" + hashlib.blake2b(
+            CACHE_NAMESPACE + b"\0" + text.encode(), digest_size=16
+        ).hexdigest()
+
+    @staticmethod
+    async def get_embedding(text: str) -> Optional[np.ndarray]:
+        """Get cached embedding for text, or None on miss"""
+        try:
+            raw = await client.get(CacheService._embedding_key(text))
+            if raw is None:
+                return None
+            return np.frombuffer(raw, dtype=np.float32)
+        except Exception as e:
+            logger.warning(f"⚠️ Embedding cache get failed: {str(e)}")
+            return None
+
+    @staticmethod
+    async def set_embedding(text: str, embedding: np.ndarray) -> bool:
+        """Cache embedding for text as float32 bytes"""
+        try:
+            await client.setex(
+                CacheService._embedding_key(text),
+                EMBEDDING_TTL_SECONDS,
+                np.asarray(embedding, dtype=np.float32).tobytes()
+            )
+            return True
+        except Exception as e:
+            logger.warning(f"⚠️ Embedding cache set failed: {str(e)}")
+            return False
+
+    @staticmethod
+    async def close():
+        """Close the Redis connection pool"""
+        await client.aclose()
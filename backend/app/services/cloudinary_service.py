@@ -1,10 +1,16 @@
 import cloudinary
 import cloudinary.uploader
+import cloudinary.utils
 from app.config import settings
+import asyncio
 import logging
+import time
 
 logger = logging.getLogger(__name__)
 
+# Upload files in chunks so large resumes are streamed rather than buffered
+UPLOAD_CHUNK_SIZE = 6_000_000
+
 # Configure Cloudinary
 cloudinary.config(
     cloud_name=settings.CLOUDINARY_CLOUD_NAME,
@@ -13,10 +19,13 @@ cloudinary.config(
 )
 
 class CloudinaryService:
-    """Service for handling file uploads to Cloudinary"""
+    """Service for handling file uploads to Cloudinary
+
+    The SDK is blocking, so uploads run in a worker thread and are awaitable.
+    """
 
     @staticmethod
-    def upload_resume(file, user_id: str):
+    async def upload_resume(file, user_id: str):
         """
         Upload resume to Cloudinary
         
@@ -28,9 +37,11 @@ class CloudinaryService:
             dict: Upload result with URL and metadata
         """
         try:
-            # Upload to Cloudinary
-            result = cloudinary.uploader.upload(
+            # Upload to Cloudinary in chunks straight from the spooled file
+            result = await asyncio.to_thread(
+                cloudinary.uploader.upload_large,
                 file.file,
+                chunk_size=UPLOAD_CHUNK_SIZE,
                 folder=settings.CLOUDINARY_FOLDER,
                 resource_type="auto",
                 public_id=f"resume_{user_id}",
@@ -51,42 +62,37 @@ class CloudinaryService:
             raise
 
     @staticmethod
-    def upload_video(file, user_id: str):
+    def get_upload_signature(user_id: str, resource_type: str = "video"):
         """
-        Upload video to Cloudinary
+        Sign a direct browser-to-Cloudinary upload
+        
+        The client posts the file to upload_url along with the returned fields,
+        so the bytes never pass through this server.
         
         Args:
-            file: File object from FastAPI
             user_id: User ID for organizing files
+            resource_type: Type of resource (video, image, raw)
             
         Returns:
-            dict: Upload result with URL and metadata
+            dict: Signature, timestamp and the parameters it covers
         """
-        try:
-            # Upload to Cloudinary
-            result = cloudinary.uploader.upload(
-                file.file,
-                folder=f"{settings.CLOUDINARY_FOLDER}/videos",
-                resource_type="video",
-                public_id=f"video_{user_id}",
-                overwrite=True,
-                tags=["video", user_id]
-            )
-            
-            logger.info(f"✅ Video uploaded: {result['public_id']}")
-            
-            return {
-                "url": result['secure_url'],
-                "public_id": result['public_id'],
-                "size": result['bytes'],
-                "duration": result.get('duration', 0)
-            }
-        except Exception as e:
-            logger.error(f"❌ Video upload failed: {str(e)}")
-            raise
+        params = {
+            "folder": f"{settings.CLOUDINARY_FOLDER}/{resource_type}s",
+            "public_id": f"{resource_type}_{user_id}",
+            "timestamp": int(time.time())
+        }
+        signature = cloudinary.utils.api_sign_request(params, settings.CLOUDINARY_API_SECRET)
+        
+        return {
+            **params,
+            "signature": signature,
+            "api_key": settings.CLOUDINARY_API_KEY,
+            "cloud_name": settings.CLOUDINARY_CLOUD_NAME,
+            "upload_url": f"https://api.cloudinary.com/v1_1/{settings.CLOUDINARY_CLOUD_NAME}/{resource_type}/upload"
+        }
 
     @staticmethod
-    def upload_image(file, user_id: str, image_type: str = "profile"):
+    async def upload_image(file, user_id: str, image_type: str = "profile"):
         """
         Upload image to Cloudinary
         
@@ -100,7 +106,8 @@ class CloudinaryService:
         """
         try:
             # Upload to Cloudinary
-            result = cloudinary.uploader.upload(
+            result = await asyncio.to_thread(
+                cloudinary.uploader.upload,
                 file.file,
                 folder=f"{settings.CLOUDINARY_FOLDER}/images",
                 resource_type="image",
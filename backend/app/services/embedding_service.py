@@ -1,52 +1,245 @@
 from sentence_transformers import SentenceTransformer
+from collections import OrderedDict
+from typing import List, Optional
+import numpy as np
+import diskcache
+import asyncio
+import hashlib
 import logging
+import os
+import threading
+
+from app.config import settings
+from app.utils.micro_batcher import MicroBatcher
 
 logger = logging.getLogger(__name__)
 
+EMBEDDING_MODEL_NAME = "all-MiniLM-L6-v2"
+# INT8 weights with AVX512-VNNI kernels, shipped in the model repo's onnx/ folder
+ONNX_MODEL_FILE = "onnx/model_qint8_avx512_vnni.onnx"
+
+# Micro-batching settings for concurrent single-text requests
+MAX_BATCH = 32
+BATCH_TIMEOUT_SECONDS = 0.01
+
+ENCODE_BATCH_SIZE = 32
+# Roughly one inference thread per physical core, shared between worker processes
+# and capped where scaling flattens out
+INFERENCE_THREADS = max(1, min(8, (os.cpu_count() or 2) // 2 // max(1, settings.WORKERS)))
+WARMUP_BATCH_SIZE = 8
+MEMORY_CACHE_SIZE = 4096
+
+def _onnx_session_options():
+    import onnxruntime as ort
+
+    options = ort.SessionOptions()
+    options.intra_op_num_threads = INFERENCE_THREADS
+    options.graph_optimization_level = ort.GraphOptimizationLevel.ORT_ENABLE_ALL
+    return options
+
+def _load_model() -> SentenceTransformer:
+    if settings.EMBEDDING_BACKEND == "onnx":
+        try:
+            return SentenceTransformer(
+                EMBEDDING_MODEL_NAME,
+                backend="onnx",
+                model_kwargs={
+                    "file_name": ONNX_MODEL_FILE,
+                    "provider": "CPUExecutionProvider",
+                    "session_options": _onnx_session_options(),
+                }
+            )
+        except Exception as e:
+            logger.warning(f"⚠️ ONNX backend unavailable, falling back to PyTorch: {str(e)}")
+    return SentenceTransformer(EMBEDDING_MODEL_NAME)
+
 # Load embedding model (384-dimensional)
 try:
-    model = SentenceTransformer('all-MiniLM-L6-v2')
-    logger.info("✅ Embedding model loaded successfully")
+    model = _load_model()
+    logger.info(f"✅ Embedding model loaded successfully ({model.backend} backend)")
 except Exception as e:
     logger.error(f"❌ Failed to load embedding model: {str(e)}")
     model = None
 
+class _LRUCache:
+    """Thread-safe in-process LRU keyed by text digest (so texts aren't kept alive)"""
+
+    def __init__(self, maxsize: int):
+        self.maxsize = maxsize
+        self._data = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key: bytes) -> Optional[np.ndarray]:
+        with self._lock:
+            value = self._data.get(key)
+            if value is not None:
+                self._data.move_to_end(key)
+            return value
+
+    def set(self, key: bytes, value: np.ndarray):
+        with self._lock:
+            self._data[key] = value
+            self._data.move_to_end(key)
+            if len(self._data) > self.maxsize:
+                self._data.popitem(last=False)
+
+
+# Cache keys include model and backend so switching either invalidates old entries
+CACHE_NAMESPACE = f"{EMBEDDING_MODEL_NAME}:{model.backend if model is not None else 'none'}".encode()
+_memory_cache = _LRUCache(MEMORY_CACHE_SIZE)
+try:
+    _disk_cache = diskcache.Cache(settings.EMBEDDING_CACHE_DIR)
+except Exception as e:
+    logger.warning(f"⚠️ Embedding disk cache unavailable: {str(e)}")
+    _disk_cache = None
+
+
+def _cache_key(text: str) -> bytes:
+    return hashlib.blake2b(CACHE_NAMESPACE + b"\0" + text.encode(), digest_size=16).digest()
+
+def _cache_lookup(key: bytes) -> Optional[np.ndarray]:
+    embedding = _memory_cache.get(key)
+    if embedding is None and _disk_cache is not None:
+        try:
+            raw = _disk_cache.get(key)
+        except Exception as e:
+            logger.warning(f"⚠️ Embedding disk cache read failed: {str(e)}")
+            raw = None
+        if raw is not None:
+            embedding = np.frombuffer(raw, dtype=np.float32)
+            _memory_cache.set(key, embedding)
+    return embedding
+
+def _cache_store(key: bytes, embedding: np.ndarray):
+    # Cached arrays are handed straight to callers, so keep them immutable
+    embedding.flags.writeable = False
+    _memory_cache.set(key, embedding)
+    if _disk_cache is not None:
+        try:
+            _disk_cache.set(key, embedding.tobytes())
+        except Exception as e:
+            logger.warning(f"⚠️ Embedding disk cache write failed: {str(e)}")
+
+def _encode_uncached(texts: List[str]) -> np.ndarray:
+    # encode() already sorts by length before batching and restores input order,
+    # so padding per minibatch is minimal without pre-sorting here
+    return model.encode(
+        texts,
+        batch_size=ENCODE_BATCH_SIZE,
+        convert_to_numpy=True,
+        normalize_embeddings=True
+    )
+
+def _encode_cached(texts: List[str]) -> List[np.ndarray]:
+    """Encode texts, running the model only for those not already cached"""
+    if model is None:
+        raise Exception("Embedding model not loaded")
+
+    keys = [_cache_key(text) for text in texts]
+    results = [_cache_lookup(key) for key in keys]
+
+    # Unique misses, encoded together in one model call
+    missing = {}
+    for key, text, embedding in zip(keys, texts, results):
+        if embedding is None:
+            missing.setdefault(key, text)
+
+    if missing:
+        encoded = _encode_uncached(list(missing.values()))
+        fresh = {}
+        for key, embedding in zip(missing, encoded):
+            embedding = np.array(embedding, dtype=np.float32)
+            _cache_store(key, embedding)
+            fresh[key] = embedding
+        results = [fresh[key] if embedding is None else embedding for key, embedding in zip(keys, results)]
+
+    return results
+
+
+async def _encode_batch_async(texts: List[str]) -> List[np.ndarray]:
+    return await asyncio.to_thread(_encode_cached, texts)
+
+
+_batcher = MicroBatcher(_encode_batch_async, MAX_BATCH, BATCH_TIMEOUT_SECONDS, name="Embedding")
+
+
 class EmbeddingService:
     """Service for generating embeddings"""
 
     @staticmethod
-    def generate_embedding(text: str):
-        """Generate embedding for text"""
+    def generate_embedding(text: str) -> Optional[np.ndarray]:
+        """Generate embedding for text (float32 vector; convert with .tolist() only for JSON)"""
         try:
-            if model is None:
-                raise Exception("Embedding model not loaded")
-            
-            embedding = model.encode(text, convert_to_tensor=False)
+            embedding = _encode_cached([text])[0]
             logger.info(f"✅ Embedding generated: {len(embedding)} dimensions")
-            return embedding.tolist()
+            return embedding
         except Exception as e:
             logger.error(f"❌ Failed to generate embedding: {str(e)}")
             return None
 
     @staticmethod
-    def generate_embeddings_batch(texts: list):
-        """Generate embeddings for multiple texts"""
+    async def embed_async(text: str) -> Optional[np.ndarray]:
+        """Generate embedding for text via the shared micro-batcher"""
         try:
-            if model is None:
-                raise Exception("Embedding model not loaded")
-            
-            embeddings = model.encode(texts, convert_to_tensor=False)
+            return await _batcher.submit(text)
+        except Exception as e:
+            logger.error(f"❌ Failed to generate embedding: {str(e)}")
+            return None
+
+    @staticmethod
+    def get_cached(text: str) -> Optional[np.ndarray]:
+        """Embedding from the in-process or disk cache, without running the model"""
+        return _cache_lookup(_cache_key(text))
+
+    @staticmethod
+    def set_cached(text: str, embedding: np.ndarray):
+        """Keep an embedding computed elsewhere (e.g. by another process) in the local caches"""
+        _cache_store(_cache_key(text), np.array(embedding, dtype=np.float32))
+
+    @staticmethod
+    def start_batcher():
+        """Start the micro-batching consumer (call from app lifespan)"""
+        _batcher.start()
+
+    @staticmethod
+    async def stop_batcher():
+        """Stop the micro-batching consumer"""
+        await _batcher.stop()
+
+    @staticmethod
+    def generate_embeddings_batch(texts: list) -> Optional[np.ndarray]:
+        """Generate embeddings for multiple texts as one (n, dim) matrix"""
+        try:
+            embeddings = np.vstack(_encode_cached(texts)) if texts else np.empty((0, 384), dtype=np.float32)
             logger.info(f"✅ Batch embeddings generated: {len(embeddings)} items")
-            return [e.tolist() for e in embeddings]
+            return embeddings
         except Exception as e:
             logger.error(f"❌ Failed to generate batch embeddings: {str(e)}")
             return None
 
+    @staticmethod
+    def warmup():
+        """Run a dummy batch so the first real request doesn't pay for lazy init"""
+        if model is None:
+            return
+        try:
+            if model.backend == "torch":
+                import torch
+
+                # The default can oversubscribe cores alongside uvicorn workers
+                torch.set_num_threads(INFERENCE_THREADS)
+            # A full batch, so batched kernels and tokenizer paths are warm too
+            model.encode(["warmup"] * WARMUP_BATCH_SIZE, batch_size=WARMUP_BATCH_SIZE)
+            logger.info("✅ Embedding model warmed up")
+        except Exception as e:
+            logger.error(f"❌ Embedding warmup failed: {str(e)}")
+
     @staticmethod
     def get_model_info():
         """Get model information"""
         return {
-            "model_name": "all-MiniLM-L6-v2",
+            "model_name": EMBEDDING_MODEL_NAME,
+            "backend": model.backend if model is not None else None,
             "embedding_dimension": 384,
             "model_size": "small",
             "description": "Fast and efficient embedding model"
@@ -1,16 +1,66 @@
+import asyncio
 import faiss
 import numpy as np
-import json
+import msgpack
+import orjson
 import os
 import logging
-from typing import List, Dict, Optional
+import sqlite3
+import threading
+from typing import List, Dict, Optional, Tuple
+
+from app.config import settings
+from app.utils.micro_batcher import MicroBatcher
+from app.utils.rw_lock import ReadWriteLock
 
 logger = logging.getLogger(__name__)
 
 # FAISS data directory
 FAISS_DATA_DIR = "./faiss_data"
 FAISS_INDEX_PATH = os.path.join(FAISS_DATA_DIR, "resumes.index")
-FAISS_METADATA_PATH = os.path.join(FAISS_DATA_DIR, "metadata.json")
+FAISS_METADATA_DB_PATH = os.path.join(FAISS_DATA_DIR, "metadata.db")
+# Raw fp16 embeddings, row i holds the vector at index position i
+FAISS_VECTORS_PATH = os.path.join(FAISS_DATA_DIR, "vectors.f16")
+# Metadata file written by older versions, imported into metadata.db once
+LEGACY_METADATA_PATH = os.path.join(FAISS_DATA_DIR, "metadata.json")
+# A rebuild that moves positions writes its index and vectors here first; they replace
+# the live files only once the new positions are committed to metadata.db
+INDEX_SWAP_PATH = FAISS_INDEX_PATH + ".swap"
+VECTORS_SWAP_PATH = FAISS_VECTORS_PATH + ".swap"
+
+# Index layout (384 dimensions for sentence-transformers)
+EMBEDDING_DIM = 384
+HNSW_M = 32
+HNSW_EF_CONSTRUCTION = 200
+HNSW_EF_SEARCH = 64
+IVF_FACTORY = "IVF1024,PQ48x8"
+IVF_NPROBE = 8
+# HNSW over fp32 to start, HNSW over int8 codes once the quantizer can be trained,
+# then IVF-PQ for large corpora. A tier is kept until the corpus falls below half its threshold.
+SQ_TRAIN_THRESHOLD = 1024
+IVF_TRAIN_THRESHOLD = 100_000
+TIER_THRESHOLDS = (0, SQ_TRAIN_THRESHOLD, IVF_TRAIN_THRESHOLD)
+TRAIN_SAMPLE_SIZE = 1024 * 64
+# Deleted vectors stay in the index (unmapped) until they exceed this share of it
+COMPACT_FRACTION = 0.1
+
+# Stored embeddings are half precision; the vector file grows by doubling
+VECTOR_DTYPE = np.float16
+INITIAL_VECTOR_CAPACITY = 1024
+
+# The index file is rewritten after this many adds, or by the periodic flusher.
+# Rows in metadata.db plus vectors.f16 cover every add, so unflushed adds are replayed on startup.
+FLUSH_EVERY_N_WRITES = 64
+FLUSH_INTERVAL_SECONDS = 5
+# Read-only processes check this often for an index file replaced by the writer
+RELOAD_INTERVAL_SECONDS = 5
+
+# Concurrent uploads are collected for up to this long (or this many) per index.add
+ADD_BATCH_SIZE = 32
+ADD_BATCH_TIMEOUT_SECONDS = 0.05
+
+# Returned (as a shallow copy) when the index is empty; callers must not mutate the lists
+_EMPTY_RESULT = {"ids": [], "distances": [], "documents": [], "metadatas": []}
 
 # Ensure directory exists
 os.makedirs(FAISS_DATA_DIR, exist_ok=True)
@@ -20,117 +70,620 @@ class FAISSService:
     """Service for handling vector embeddings with FAISS"""
 
     _index = None
-    _metadata = {}
+    _db = None  # SQLite store for text, metadata and embeddings
+    _db_lock = threading.Lock()
+    _vectors = None  # np.memmap of stored embeddings, (capacity, EMBEDDING_DIM) fp16
     _id_to_index = {}  # Map resume_id to FAISS index position
+    _index_to_id: Dict[int, str] = {}  # Reverse of _id_to_index, used to resolve search hits
+    # Searches share the index; adds, deletes and swaps take it exclusively (FAISS releases the GIL)
+    _index_lock = ReadWriteLock()
+    _flush_lock = threading.Lock()  # one index file write at a time
+    _index_mtime = None  # st_mtime_ns of the index file last loaded
+    _dirty = False
+    _pending_writes = 0
+    _background_task = None  # periodic flush (writer) or reload (read-only)
+    _maintenance_thread = None  # background tier upgrade / compaction, if running
+    _index_generation = 0  # bumped whenever the index object is replaced
+
+    @staticmethod
+    def _configure_hnsw(index):
+        index.hnsw.efConstruction = HNSW_EF_CONSTRUCTION
+        index.hnsw.efSearch = HNSW_EF_SEARCH
+        return index
+
+    @staticmethod
+    def _new_index():
+        """Create an empty HNSW index (inner product == cosine on unit vectors)"""
+        return FAISSService._configure_hnsw(
+            faiss.IndexHNSWFlat(EMBEDDING_DIM, HNSW_M, faiss.METRIC_INNER_PRODUCT)
+        )
+
+    @staticmethod
+    def _migrate_legacy_index():
+        """Rebuild the IndexFlatL2 written by older versions as HNSW"""
+        index = FAISSService._index
+        if not isinstance(index, faiss.IndexFlat):
+            return
+
+        new_index = FAISSService._new_index()
+        if index.ntotal:
+            vectors = index.reconstruct_n(0, index.ntotal)
+            if index.metric_type != faiss.METRIC_INNER_PRODUCT:
+                faiss.normalize_L2(vectors)
+            new_index.add(vectors)
+        FAISSService._index = new_index
+        # Written once initialize() finishes, so the old file isn't migrated again on restart
+        FAISSService._dirty = True
+        logger.info(f"✅ Migrated FAISS index to HNSW ({new_index.ntotal} items)")
+
+    @staticmethod
+    def _read_index():
+        """Read the index file and apply search-time parameters"""
+        if settings.FAISS_READ_ONLY:
+            # Only IVF inverted lists are mmapped (shared page cache across processes);
+            # HNSW tiers are still read fully into memory
+            index = faiss.read_index(FAISS_INDEX_PATH, faiss.IO_FLAG_MMAP | faiss.IO_FLAG_READ_ONLY)
+        else:
+            index = faiss.read_index(FAISS_INDEX_PATH)
+        if isinstance(index, faiss.IndexIVF):
+            index.nprobe = IVF_NPROBE
+        elif isinstance(index, faiss.IndexHNSW):
+            index.hnsw.efSearch = HNSW_EF_SEARCH
+        return index
 
     @staticmethod
     def _load_index():
         """Load FAISS index from disk"""
         try:
             if os.path.exists(FAISS_INDEX_PATH):
-                FAISSService._index = faiss.read_index(FAISS_INDEX_PATH)
+                FAISSService._index_mtime = os.stat(FAISS_INDEX_PATH).st_mtime_ns
+                FAISSService._index = FAISSService._read_index()
+                if not settings.FAISS_READ_ONLY:
+                    FAISSService._migrate_legacy_index()
                 logger.info(f"✅ Loaded FAISS index with {FAISSService._index.ntotal} items")
             else:
-                # Create new index (384 dimensions for sentence-transformers)
-                FAISSService._index = faiss.IndexFlatL2(384)
+                FAISSService._index = FAISSService._new_index()
                 logger.info("✅ Created new FAISS index")
         except Exception as e:
             logger.error(f"❌ Failed to load index: {str(e)}")
-            FAISSService._index = faiss.IndexFlatL2(384)
+            FAISSService._index = FAISSService._new_index()
 
     @staticmethod
-    def _load_metadata():
-        """Load metadata from disk"""
+    def _tier_of(index) -> int:
+        if isinstance(index, faiss.IndexIVF):
+            return 2
+        if isinstance(index, faiss.IndexHNSWSQ):
+            return 1
+        return 0
+
+    @staticmethod
+    def _target_tier(index, live: int) -> int:
+        """Tier for this many live vectors, keeping the current one down to half its threshold"""
+        tier = sum(live >= threshold for threshold in TIER_THRESHOLDS[1:])
+        current = FAISSService._tier_of(index)
+        if current > tier and live >= TIER_THRESHOLDS[current] // 2:
+            return current
+        return tier
+
+    @staticmethod
+    def _build_index(vectors: np.ndarray, tier: int):
+        """Build (and train, if needed) an index of the given tier over these vectors"""
+        if tier == 2:
+            index = faiss.index_factory(EMBEDDING_DIM, IVF_FACTORY, faiss.METRIC_INNER_PRODUCT)
+            index.nprobe = IVF_NPROBE
+        elif tier == 1:
+            # 1 byte per dimension instead of 4
+            index = FAISSService._configure_hnsw(
+                faiss.IndexHNSWSQ(
+                    EMBEDDING_DIM, faiss.ScalarQuantizer.QT_8bit, HNSW_M, faiss.METRIC_INNER_PRODUCT
+                )
+            )
+        else:
+            index = FAISSService._new_index()
+
+        if not index.is_trained:
+            sample = vectors
+            if len(vectors) > TRAIN_SAMPLE_SIZE:
+                rng = np.random.default_rng(0)
+                sample = vectors[rng.choice(len(vectors), TRAIN_SAMPLE_SIZE, replace=False)]
+            index.train(sample)
+            logger.info(f"✅ Trained {type(index).__name__} on {len(sample)} vectors")
+        if len(vectors):
+            index.add(vectors)
+        return index
+
+    @staticmethod
+    def _needs_maintenance() -> bool:
+        """Whether the index should be compacted or moved to another tier (hold _index_lock)"""
+        index = FAISSService._index
+        live = len(FAISSService._index_to_id)
+        if index.ntotal - live > COMPACT_FRACTION * index.ntotal:
+            return True
+        return FAISSService._tier_of(index) != FAISSService._target_tier(index, live)
+
+    @staticmethod
+    def _schedule_maintenance():
+        """Start the background rebuild if the index needs one and none is running"""
+        if settings.FAISS_READ_ONLY or FAISSService._index is None:
+            return
+        with FAISSService._index_lock.write():
+            if FAISSService._maintenance_thread is not None or not FAISSService._needs_maintenance():
+                return
+            FAISSService._maintenance_thread = threading.Thread(
+                target=FAISSService._run_maintenance, name="faiss-maintenance", daemon=True
+            )
+            FAISSService._maintenance_thread.start()
+
+    @staticmethod
+    def _run_maintenance():
+        """Rebuild from a snapshot without holding the lock, then swap the result in"""
         try:
-            if os.path.exists(FAISS_METADATA_PATH):
-                with open(FAISS_METADATA_PATH, 'r') as f:
-                    data = json.load(f)
-                    FAISSService._metadata = data.get("metadata", {})
-                    FAISSService._id_to_index = data.get("id_to_index", {})
-                logger.info(f"✅ Loaded metadata for {len(FAISSService._metadata)} items")
+            while True:
+                with FAISSService._index_lock.read():
+                    if not FAISSService._needs_maintenance():
+                        FAISSService._maintenance_thread = None
+                        return
+                    generation = FAISSService._index_generation
+                    total = FAISSService._index.ntotal
+                    live = sorted(FAISSService._index_to_id)
+                    tier = FAISSService._target_tier(FAISSService._index, len(live))
+                    vectors = np.asarray(FAISSService._vectors[live], dtype=np.float32)
+
+                new_index = FAISSService._build_index(vectors, tier)
+
+                with FAISSService._index_lock.write():
+                    # Replaced meanwhile (clear, startup rebuild): check again from scratch
+                    if generation == FAISSService._index_generation:
+                        FAISSService._swap_in(new_index, live, total, vectors)
+        except Exception as e:
+            logger.error(f"❌ FAISS index maintenance failed: {str(e)}")
+            with FAISSService._index_lock.write():
+                FAISSService._maintenance_thread = None
+
+    @staticmethod
+    def _swap_in(new_index, live: List[int], snapshot_total: int, vectors: np.ndarray):
+        """Install an index built from the live positions below snapshot_total (hold _index_lock for writing)"""
+        total = FAISSService._index.ntotal
+
+        # Adds that landed while the new index was building keep their order after the snapshot
+        tail = np.array(FAISSService._vectors[snapshot_total:total])
+        if len(tail):
+            new_index.add(tail.astype(np.float32))
+
+        offset = len(live) - snapshot_total
+        if offset:
+            new_positions = {old: new for new, old in enumerate(live)}
+            id_to_index = {
+                resume_id: new_positions[position] if position < snapshot_total else position + offset
+                for resume_id, position in FAISSService._id_to_index.items()
+            }
+            FAISSService._commit_layout(new_index, id_to_index, np.concatenate([vectors, tail]))
+        else:
+            # Positions unchanged, so the old and new index files both match the metadata
+            FAISSService._index = new_index
+            FAISSService._index_generation += 1
+            FAISSService._dirty = True
+            FAISSService.flush()
+        logger.info(f"✅ Swapped in {type(new_index).__name__} with {new_index.ntotal} items")
+
+    @staticmethod
+    def _commit_layout(new_index, id_to_index: Dict[str, int], vectors: np.ndarray):
+        """Install an index whose positions differ from the stored ones (hold _index_lock for writing)
+
+        vectors holds the embedding for each new position. Committing the positions
+        together with the swap_pending flag is the commit point: a crash before it keeps
+        the old files, a crash after it is finished by _finish_swap on startup.
+        """
+        capacity = max(FAISSService._vectors.shape[0], len(vectors))
+        swap = np.memmap(VECTORS_SWAP_PATH, dtype=VECTOR_DTYPE, mode="w+", shape=(capacity, EMBEDDING_DIM))
+        swap[:len(vectors)] = vectors
+        swap.flush()
+        del swap
+        faiss.write_index(new_index, INDEX_SWAP_PATH)
+
+        with FAISSService._db_lock, FAISSService._db:
+            FAISSService._db.executemany(
+                "UPDATE resumes SET faiss_idx = ? WHERE resume_id = ?",
+                [(position, resume_id) for resume_id, position in id_to_index.items()]
+            )
+            FAISSService._db.execute("INSERT OR REPLACE INTO state (key, value) VALUES ('swap_pending', 1)")
+
+        FAISSService._index = new_index
+        FAISSService._index_generation += 1
+        FAISSService._set_positions(id_to_index)
+        FAISSService._finish_swap()
+        FAISSService._open_vectors()
+
+        # The index file now matches memory
+        FAISSService._dirty = False
+        FAISSService._pending_writes = 0
+
+    @staticmethod
+    def _finish_swap():
+        """Move committed swap files into place, or drop ones whose positions never committed"""
+        with FAISSService._db_lock:
+            row = FAISSService._db.execute("SELECT value FROM state WHERE key = 'swap_pending'").fetchone()
+        pending = row is not None and bool(row[0])
+
+        for swap_path, path in ((VECTORS_SWAP_PATH, FAISS_VECTORS_PATH), (INDEX_SWAP_PATH, FAISS_INDEX_PATH)):
+            if not os.path.exists(swap_path):
+                continue
+            if pending:
+                os.replace(swap_path, path)
             else:
-                FAISSService._metadata = {}
-                FAISSService._id_to_index = {}
+                os.remove(swap_path)
+
+        if pending:
+            with FAISSService._db_lock, FAISSService._db:
+                FAISSService._db.execute("DELETE FROM state WHERE key = 'swap_pending'")
+
+    @staticmethod
+    def _open_db():
+        """Open the metadata store (WAL, so readers don't block the writer)"""
+        if settings.FAISS_READ_ONLY:
+            db = sqlite3.connect(
+                f"file:{FAISS_METADATA_DB_PATH}?mode=ro", uri=True, check_same_thread=False
+            )
+        else:
+            db = sqlite3.connect(FAISS_METADATA_DB_PATH, check_same_thread=False)
+            db.execute("PRAGMA journal_mode=WAL")
+            db.execute("PRAGMA synchronous=NORMAL")
+            db.execute(
+                """CREATE TABLE IF NOT EXISTS resumes (
+                    resume_id TEXT PRIMARY KEY,
+                    faiss_idx INTEGER NOT NULL,
+                    text TEXT NOT NULL,
+                    metadata BLOB NOT NULL
+                )"""
+            )
+            db.execute("CREATE TABLE IF NOT EXISTS state (key TEXT PRIMARY KEY, value INTEGER NOT NULL)")
+            db.commit()
+        FAISSService._db = db
+
+    @staticmethod
+    def _map_vectors(capacity: int):
+        """(Re)map the vector file with room for capacity rows, extending it if needed"""
+        if FAISSService._vectors is not None:
+            FAISSService._vectors.flush()
+            FAISSService._vectors = None
+        mode = "r+" if os.path.exists(FAISS_VECTORS_PATH) else "w+"
+        FAISSService._vectors = np.memmap(
+            FAISS_VECTORS_PATH, dtype=VECTOR_DTYPE, mode=mode, shape=(capacity, EMBEDDING_DIM)
+        )
+
+    @staticmethod
+    def _open_vectors():
+        """Map the stored embeddings (not needed by read-only workers)"""
+        row_bytes = EMBEDDING_DIM * np.dtype(VECTOR_DTYPE).itemsize
+        stored = os.path.getsize(FAISS_VECTORS_PATH) // row_bytes if os.path.exists(FAISS_VECTORS_PATH) else 0
+        FAISSService._map_vectors(max(stored, INITIAL_VECTOR_CAPACITY))
+
+    @staticmethod
+    def _ensure_capacity(rows: int):
+        capacity = FAISSService._vectors.shape[0]
+        if rows > capacity:
+            FAISSService._map_vectors(max(rows, capacity * 2))
+
+    @staticmethod
+    def _store_vectors(start: int, vectors: np.ndarray):
+        FAISSService._ensure_capacity(start + len(vectors))
+        FAISSService._vectors[start:start + len(vectors)] = vectors
+
+    @staticmethod
+    def _import_legacy_metadata():
+        """Move metadata.json from older versions into SQLite"""
+        if settings.FAISS_READ_ONLY or not os.path.exists(LEGACY_METADATA_PATH):
+            return
+
+        with open(LEGACY_METADATA_PATH, 'rb') as f:
+            data = orjson.loads(f.read())
+        metadata = data.get("metadata", {})
+        id_to_index = data.get("id_to_index", {})
+
+        # Older versions kept vectors only in the index (already migrated to HNSW above)
+        vectors = FAISSService._index.reconstruct_n(0, FAISSService._index.ntotal)
+
+        rows = [
+            (
+                resume_id,
+                position,
+                metadata[resume_id].get("text", ""),
+                msgpack.packb(metadata[resume_id].get("metadata", {}))
+            )
+            for resume_id, position in id_to_index.items()
+            if resume_id in metadata and position < len(vectors)
+        ]
+        FAISSService._store_vectors(0, vectors)
+        FAISSService._vectors.flush()
+        with FAISSService._db_lock, FAISSService._db:
+            FAISSService._db.executemany(
+                "INSERT OR REPLACE INTO resumes (resume_id, faiss_idx, text, metadata) VALUES (?, ?, ?, ?)",
+                rows
+            )
+
+        os.replace(LEGACY_METADATA_PATH, LEGACY_METADATA_PATH + ".migrated")
+        logger.info(f"✅ Imported {len(rows)} resumes from metadata.json")
+
+    @staticmethod
+    def _load_metadata():
+        """Load the resume_id -> position map from the metadata store"""
+        try:
+            if FAISSService._db is None:
+                FAISSService._open_db()
+            if not settings.FAISS_READ_ONLY:
+                FAISSService._open_vectors()
+            FAISSService._import_legacy_metadata()
+            with FAISSService._db_lock:
+                rows = FAISSService._db.execute("SELECT resume_id, faiss_idx FROM resumes").fetchall()
+            FAISSService._set_positions(dict(rows))
+            logger.info(f"✅ Loaded metadata for {len(FAISSService._id_to_index)} items")
         except Exception as e:
             logger.error(f"❌ Failed to load metadata: {str(e)}")
-            FAISSService._metadata = {}
-            FAISSService._id_to_index = {}
+            FAISSService._set_positions({})
+
+    @staticmethod
+    def _set_positions(id_to_index: Dict[str, int]):
+        """Replace both position maps at once"""
+        FAISSService._id_to_index = id_to_index
+        FAISSService._index_to_id = {idx: resume_id for resume_id, idx in id_to_index.items()}
+
+    @staticmethod
+    def _fetch_resumes(resume_ids: List[str]) -> Dict[str, tuple]:
+        """Fetch (text, metadata) for the given ids"""
+        if not resume_ids:
+            return {}
+        placeholders = ",".join("?" * len(resume_ids))
+        with FAISSService._db_lock:
+            rows = FAISSService._db.execute(
+                f"SELECT resume_id, text, metadata FROM resumes WHERE resume_id IN ({placeholders})",
+                resume_ids
+            ).fetchall()
+        return {
+            resume_id: (text, msgpack.unpackb(metadata))
+            for resume_id, text, metadata in rows
+        }
 
     @staticmethod
     def _save_index():
         """Save FAISS index to disk"""
         try:
-            if FAISSService._index is not None:
-                faiss.write_index(FAISSService._index, FAISS_INDEX_PATH)
+            if FAISSService._index is not None and not settings.FAISS_READ_ONLY:
+                # Replace rather than rewrite in place: read-only processes may have it mapped
+                tmp_path = FAISS_INDEX_PATH + ".tmp"
+                faiss.write_index(FAISSService._index, tmp_path)
+                os.replace(tmp_path, FAISS_INDEX_PATH)
                 logger.info("✅ Saved FAISS index")
         except Exception as e:
             logger.error(f"❌ Failed to save index: {str(e)}")
 
     @staticmethod
-    def _save_metadata():
-        """Save metadata to disk"""
-        try:
-            data = {
-                "metadata": FAISSService._metadata,
-                "id_to_index": FAISSService._id_to_index
-            }
-            with open(FAISS_METADATA_PATH, 'w') as f:
-                json.dump(data, f, indent=2)
-            logger.info("✅ Saved metadata")
-        except Exception as e:
-            logger.error(f"❌ Failed to save metadata: {str(e)}")
+    def _replay_pending():
+        """Add vectors stored in metadata.db but missing from the last index flush"""
+        if settings.FAISS_READ_ONLY:
+            return
+
+        total = FAISSService._index.ntotal
+        with FAISSService._db_lock:
+            rows = FAISSService._db.execute(
+                "SELECT faiss_idx FROM resumes WHERE faiss_idx >= ? ORDER BY faiss_idx",
+                (total,)
+            ).fetchall()
+        if not rows:
+            return
+
+        if any(position != total + i for i, (position,) in enumerate(rows)):
+            logger.warning("⚠️ Index and metadata out of sync, rebuilding")
+            FAISSService._rebuild_index()
+            return
+
+        FAISSService._index.add(
+            np.asarray(FAISSService._vectors[total:total + len(rows)], dtype=np.float32)
+        )
+        FAISSService._save_index()
+        logger.info(f"✅ Replayed {len(rows)} unflushed resumes into FAISS index")
 
     @staticmethod
     def initialize():
         """Initialize FAISS service"""
+        if not settings.FAISS_READ_ONLY:
+            # Finish (or roll back) a rebuild interrupted before its files were in place
+            FAISSService._open_db()
+            FAISSService._finish_swap()
         FAISSService._load_index()
         FAISSService._load_metadata()
+        FAISSService._replay_pending()
+        FAISSService.flush()
+        FAISSService._schedule_maintenance()
         logger.info("✅ FAISS service initialized")
 
+    @staticmethod
+    async def initialize_async():
+        """Initialize FAISS service without blocking the event loop"""
+        await asyncio.to_thread(FAISSService.initialize)
+
+    @staticmethod
+    def flush():
+        """Write the index to disk if it changed since the last flush"""
+        # Writing only reads the index, so searches carry on while it runs; adds wait
+        with FAISSService._index_lock.read(), FAISSService._flush_lock:
+            if not FAISSService._dirty:
+                return
+            if FAISSService._vectors is not None:
+                FAISSService._vectors.flush()
+            FAISSService._save_index()
+            FAISSService._dirty = False
+            FAISSService._pending_writes = 0
+
+    @staticmethod
+    def _mark_dirty(writes: int = 1):
+        FAISSService._dirty = True
+        FAISSService._pending_writes += writes
+        if FAISSService._pending_writes >= FLUSH_EVERY_N_WRITES:
+            FAISSService.flush()
+
+    @staticmethod
+    def reload_if_changed():
+        """Pick up an index file replaced by the writer process (read-only mode)"""
+        try:
+            mtime = os.stat(FAISS_INDEX_PATH).st_mtime_ns
+        except FileNotFoundError:
+            return
+        if mtime == FAISSService._index_mtime:
+            return
+
+        try:
+            index = FAISSService._read_index()
+            with FAISSService._db_lock:
+                rows = FAISSService._db.execute("SELECT resume_id, faiss_idx FROM resumes").fetchall()
+        except Exception as e:
+            logger.error(f"❌ Failed to reload index: {str(e)}")
+            return
+
+        with FAISSService._index_lock.write():
+            FAISSService._index = index
+            FAISSService._index_generation += 1
+            FAISSService._index_mtime = mtime
+            FAISSService._set_positions(dict(rows))
+        logger.info(f"✅ Reloaded FAISS index with {index.ntotal} items")
+
+    @staticmethod
+    async def _flush_periodically():
+        while True:
+            await asyncio.sleep(FLUSH_INTERVAL_SECONDS)
+            if FAISSService._dirty:
+                await asyncio.to_thread(FAISSService.flush)
+
+    @staticmethod
+    async def _reload_periodically():
+        while True:
+            await asyncio.sleep(RELOAD_INTERVAL_SECONDS)
+            await asyncio.to_thread(FAISSService.reload_if_changed)
+
+    @staticmethod
+    def start_flusher():
+        """Start the periodic flush and add batcher, or index reloads when read-only (call from app lifespan)"""
+        if FAISSService._background_task is not None:
+            return
+        if settings.FAISS_READ_ONLY:
+            FAISSService._background_task = asyncio.create_task(FAISSService._reload_periodically())
+        else:
+            FAISSService._background_task = asyncio.create_task(FAISSService._flush_periodically())
+            _add_batcher.start()
+
+    @staticmethod
+    async def stop_flusher():
+        """Stop the add batcher and the periodic flush or reload"""
+        await _add_batcher.stop()
+        if FAISSService._background_task is None:
+            return
+        FAISSService._background_task.cancel()
+        try:
+            await FAISSService._background_task
+        except asyncio.CancelledError:
+            pass
+        FAISSService._background_task = None
+
+    @staticmethod
+    def persist():
+        """Write pending index changes to disk (metadata is written on every change)"""
+        if FAISSService._index is None or settings.FAISS_READ_ONLY:
+            return
+        FAISSService.flush()
+
+    @staticmethod
+    async def search_resumes_async(
+        query_embedding: np.ndarray,
+        n_results: int = 10
+    ) -> Optional[Dict]:
+        """Search in a worker thread, so waiting on the index lock doesn't block the loop"""
+        return await asyncio.to_thread(FAISSService.search_resumes, query_embedding, n_results)
+
     @staticmethod
     def add_resume(
         resume_id: str,
         resume_text: str,
-        embedding: List[float],
+        embedding: np.ndarray,
         metadata: Dict = None
     ) -> bool:
         """Add resume to FAISS"""
+        return FAISSService.add_resumes_batch([(resume_id, resume_text, embedding, metadata)])
+
+    @staticmethod
+    def add_resumes_batch(items: List[Tuple[str, str, np.ndarray, Optional[Dict]]]) -> bool:
+        """Add (resume_id, text, embedding, metadata) tuples with a single index.add call"""
+        if not items:
+            return True
         try:
             if FAISSService._index is None:
                 FAISSService.initialize()
 
-            # Convert embedding to numpy array
-            embedding_array = np.array([embedding], dtype=np.float32)
-
-            # Get current index position
-            index_position = FAISSService._index.ntotal
-
-            # Add to FAISS
-            FAISSService._index.add(embedding_array)
-
-            # Store metadata
-            if metadata is None:
-                metadata = {}
-
-            FAISSService._metadata[resume_id] = {
-                "text": resume_text,
-                "metadata": metadata
-            }
-            FAISSService._id_to_index[resume_id] = index_position
-
-            # Save to disk
-            FAISSService._save_index()
-            FAISSService._save_metadata()
+            if settings.FAISS_READ_ONLY:
+                logger.warning("⚠️ FAISS index is read-only, skipping add")
+                return False
 
-            logger.info(f"✅ Resume added: {resume_id}")
+            # One contiguous (n, dim) matrix so FAISS processes all rows in one pass
+            matrix = np.ascontiguousarray(
+                np.vstack([embedding for _, _, embedding, _ in items]), dtype=np.float32
+            )
+            # Inner product ranks by cosine only on unit vectors
+            faiss.normalize_L2(matrix)
+
+            with FAISSService._index_lock.write():
+                start = FAISSService._index.ntotal
+
+                # Vectors and metadata rows first: they are the log replayed after a crash
+                FAISSService._store_vectors(start, matrix)
+                with FAISSService._db_lock, FAISSService._db:
+                    FAISSService._db.executemany(
+                        "INSERT OR REPLACE INTO resumes (resume_id, faiss_idx, text, metadata) VALUES (?, ?, ?, ?)",
+                        (
+                            (
+                                resume_id,
+                                start + i,
+                                resume_text,
+                                msgpack.packb(metadata or {})
+                            )
+                            for i, (resume_id, resume_text, _, metadata) in enumerate(items)
+                        )
+                    )
+
+                FAISSService._index.add(matrix)
+                for i, (resume_id, _, _, _) in enumerate(items):
+                    # A re-added resume leaves its old vector orphaned; stop resolving it
+                    old_position = FAISSService._id_to_index.get(resume_id)
+                    if old_position is not None:
+                        FAISSService._index_to_id.pop(old_position, None)
+                    FAISSService._id_to_index[resume_id] = start + i
+                    FAISSService._index_to_id[start + i] = resume_id
+
+                FAISSService._mark_dirty(len(items))
+
+            # Tier upgrades train and rebuild in the background, not in this request
+            FAISSService._schedule_maintenance()
+
+            logger.info(f"✅ Resumes added: {len(items)}")
             return True
+        except Exception as e:
+            logger.error(f"❌ Failed to add resumes: {str(e)}")
+            return False
+
+    @staticmethod
+    async def add_resume_async(
+        resume_id: str,
+        resume_text: str,
+        embedding: np.ndarray,
+        metadata: Dict = None
+    ) -> bool:
+        """Add resume via the add batcher, so concurrent uploads share one index.add"""
+        try:
+            return await _add_batcher.submit((resume_id, resume_text, embedding, metadata))
         except Exception as e:
             logger.error(f"❌ Failed to add resume: {str(e)}")
             return False
 
     @staticmethod
     def search_resumes(
-        query_embedding: List[float],
+        query_embedding: np.ndarray,
         n_results: int = 10
     ) -> Optional[Dict]:
         """Search for similar resumes"""
@@ -138,46 +691,40 @@ class FAISSService:
             if FAISSService._index is None:
                 FAISSService.initialize()
 
-            if FAISSService._index.ntotal == 0:
-                logger.warning("⚠️ No resumes in index")
-                return {
-                    "ids": [],
-                    "distances": [],
-                    "documents": [],
-                    "metadatas": []
-                }
-
-            # Convert query to numpy array
-            query_array = np.array([query_embedding], dtype=np.float32)
-
-            # Limit n_results to available items
-            n_results = min(n_results, FAISSService._index.ntotal)
+            # Copy, since normalize_L2 works in place on the caller's vector otherwise
+            query_array = np.array(query_embedding, dtype=np.float32).reshape(1, EMBEDDING_DIM)
+            faiss.normalize_L2(query_array)
+
+            # Searches may run together, but not alongside an add to the same graph
+            with FAISSService._index_lock.read():
+                total = FAISSService._index.ntotal
+                if total == 0:
+                    logger.warning("⚠️ No resumes in index")
+                    return dict(_EMPTY_RESULT)
+
+                # Search, limited to available items; over-fetch while deleted vectors linger
+                k = n_results * 2 if total > len(FAISSService._index_to_id) else n_results
+                distances, indices = FAISSService._index.search(query_array, min(k, total))
+
+                # Map indices back to resume IDs; report cosine distance so lower stays closer
+                index_to_id = FAISSService._index_to_id
+                hits = [
+                    (index_to_id[idx], 1.0 - score)
+                    for idx, score in zip(indices[0].tolist(), distances[0].tolist())
+                    if idx in index_to_id
+                ][:n_results]
+            ids = [resume_id for resume_id, _ in hits]
+            resumes = FAISSService._fetch_resumes(ids)
+            found = [resumes.get(resume_id, ("", {})) for resume_id in ids]
 
-            # Search
-            distances, indices = FAISSService._index.search(query_array, n_results)
-
-            # Build results
             results = {
-                "ids": [],
-                "distances": [],
-                "documents": [],
-                "metadatas": []
+                "ids": ids,
+                "distances": [distance for _, distance in hits],
+                "documents": [text for text, _ in found],
+                "metadatas": [metadata for _, metadata in found]
             }
 
-            # Map indices back to resume IDs
-            index_to_id = {v: k for k, v in FAISSService._id_to_index.items()}
-
-            for idx, distance in zip(indices[0], distances[0]):
-                if idx in index_to_id:
-                    resume_id = index_to_id[idx]
-                    resume_data = FAISSService._metadata.get(resume_id, {})
-
-                    results["ids"].append(resume_id)
-                    results["distances"].append(float(distance))
-                    results["documents"].append(resume_data.get("text", ""))
-                    results["metadatas"].append(resume_data.get("metadata", {}))
-
-            logger.info(f"✅ Search completed: {len(results['ids'])} results")
+            logger.info(f"✅ Search completed: {len(ids)} results")
             return results
         except Exception as e:
             logger.error(f"❌ Search failed: {str(e)}")
@@ -187,17 +734,19 @@ class FAISSService:
     def delete_resume(resume_id: str) -> bool:
         """Delete resume from FAISS"""
         try:
-            if resume_id not in FAISSService._metadata:
-                logger.warning(f"⚠️ Resume not found: {resume_id}")
-                return False
+            with FAISSService._index_lock.write():
+                if resume_id not in FAISSService._id_to_index:
+                    logger.warning(f"⚠️ Resume not found: {resume_id}")
+                    return False
 
-            # Remove metadata
-            del FAISSService._metadata[resume_id]
-            del FAISSService._id_to_index[resume_id]
+                # Remove metadata
+                with FAISSService._db_lock, FAISSService._db:
+                    FAISSService._db.execute("DELETE FROM resumes WHERE resume_id = ?", (resume_id,))
+                FAISSService._index_to_id.pop(FAISSService._id_to_index.pop(resume_id), None)
 
-            # Note: FAISS doesn't support deletion, so we rebuild the index
-            # This is acceptable for small datasets
-            FAISSService._rebuild_index()
+            # HNSW can't remove vectors: the unmapped one is skipped by search until
+            # background maintenance compacts the index
+            FAISSService._schedule_maintenance()
 
             logger.info(f"✅ Resume deleted: {resume_id}")
             return True
@@ -207,25 +756,27 @@ class FAISSService:
 
     @staticmethod
     def _rebuild_index():
-        """Rebuild FAISS index from metadata"""
+        """Rebuild FAISS index from stored embeddings (startup recovery)"""
         try:
-            # Create new index
-            new_index = faiss.IndexFlatL2(384)
-            new_id_to_index = {}
-
-            # Re-add all embeddings
-            for idx, (resume_id, resume_data) in enumerate(FAISSService._metadata.items()):
-                # We need to store embeddings in metadata
-                # For now, we'll just rebuild the mapping
-                new_id_to_index[resume_id] = idx
-
-            FAISSService._index = new_index
-            FAISSService._id_to_index = new_id_to_index
-
-            FAISSService._save_index()
-            FAISSService._save_metadata()
-
-            logger.info("✅ Index rebuilt")
+            with FAISSService._index_lock.write():
+                with FAISSService._db_lock:
+                    rows = FAISSService._db.execute(
+                        "SELECT resume_id, faiss_idx FROM resumes ORDER BY faiss_idx"
+                    ).fetchall()
+
+                # Compact the surviving vectors to the front, then index them in one call
+                vectors = np.asarray(FAISSService._vectors[[position for _, position in rows]])
+                new_index = FAISSService._build_index(
+                    vectors.astype(np.float32),
+                    FAISSService._target_tier(FAISSService._index, len(rows))
+                )
+                FAISSService._commit_layout(
+                    new_index,
+                    {resume_id: idx for idx, (resume_id, _) in enumerate(rows)},
+                    vectors
+                )
+
+                logger.info("✅ Index rebuilt")
         except Exception as e:
             logger.error(f"❌ Failed to rebuild index: {str(e)}")
 
@@ -233,15 +784,16 @@ class FAISSService:
     def get_resume(resume_id: str) -> Optional[Dict]:
         """Get resume from FAISS"""
         try:
-            if resume_id not in FAISSService._metadata:
+            resume = FAISSService._fetch_resumes([resume_id]).get(resume_id)
+            if resume is None:
                 logger.warning(f"⚠️ Resume not found: {resume_id}")
                 return None
 
-            resume_data = FAISSService._metadata[resume_id]
+            text, metadata = resume
             return {
                 "id": resume_id,
-                "document": resume_data.get("text", ""),
-                "metadata": resume_data.get("metadata", {})
+                "document": text,
+                "metadata": metadata
             }
         except Exception as e:
             logger.error(f"❌ Failed to get resume: {str(e)}")
@@ -254,10 +806,12 @@ class FAISSService:
             if FAISSService._index is None:
                 FAISSService.initialize()
 
+            # A plain attribute read; no need to wait behind a flush or swap
+            index = FAISSService._index
             stats = {
-                "total_items": FAISSService._index.ntotal,
-                "dimension": 384,
-                "index_type": "IndexFlatL2"
+                "total_items": index.ntotal,
+                "dimension": EMBEDDING_DIM,
+                "index_type": type(index).__name__
             }
             logger.info(f"✅ Collection stats: {stats}")
             return stats
@@ -269,12 +823,15 @@ class FAISSService:
     def clear_collection() -> bool:
         """Clear all data from collection"""
         try:
-            FAISSService._index = faiss.IndexFlatL2(384)
-            FAISSService._metadata = {}
-            FAISSService._id_to_index = {}
+            with FAISSService._index_lock.write():
+                FAISSService._index = FAISSService._new_index()
+                FAISSService._index_generation += 1
+                with FAISSService._db_lock, FAISSService._db:
+                    FAISSService._db.execute("DELETE FROM resumes")
+                FAISSService._set_positions({})
 
-            FAISSService._save_index()
-            FAISSService._save_metadata()
+                FAISSService._dirty = True
+                FAISSService.flush()
 
             logger.info("✅ Collection cleared")
             return True
@@ -286,7 +843,15 @@ class FAISSService:
     def list_all_resumes() -> List[str]:
         """List all resume IDs"""
         try:
-            return list(FAISSService._metadata.keys())
+            return list(FAISSService._id_to_index.keys())
         except Exception as e:
             logger.error(f"❌ Failed to list resumes: {str(e)}")
             return []
+
+
+async def _add_batch_async(items: list) -> List[bool]:
+    added = await asyncio.to_thread(FAISSService.add_resumes_batch, items)
+    return [added] * len(items)
+
+
+_add_batcher = MicroBatcher(_add_batch_async, ADD_BATCH_SIZE, ADD_BATCH_TIMEOUT_SECONDS, name="FAISS add")
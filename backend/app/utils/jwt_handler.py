@@ -1,54 +1,143 @@
-from datetime import datetime, timedelta
+from datetime import timedelta
 from typing import Optional
+import base64
+import hashlib
+import hmac
+import time
 import jwt
+from jwt.algorithms import get_default_algorithms
+import orjson
 from app.config import settings
 import logging
 
 logger = logging.getLogger(__name__)
 
+
+def _b64url_encode(data: bytes) -> bytes:
+    return base64.urlsafe_b64encode(data).rstrip(b"=")
+
+def _b64url_decode(data: bytes) -> bytes:
+    return base64.urlsafe_b64decode(data + b"=" * (-len(data) % 4))
+
+
+# HS256 is signed by hand: the header and keyed HMAC state never change between tokens
+_USE_FAST_HS256 = settings.JWT_ALGORITHM == "HS256"
+_HEADER_B64 = _b64url_encode(b'{"alg":"HS256","typ":"JWT"}')
+
+
+def _hmac_pads(key: bytes):
+    """sha256 states already fed the inner (ipad) and outer (opad) HMAC key blocks"""
+    block_size = hashlib.sha256().block_size
+    if len(key) > block_size:
+        key = hashlib.sha256(key).digest()
+    key = key.ljust(block_size, b"\0")
+    return (
+        hashlib.sha256(bytes(b ^ 0x36 for b in key)),
+        hashlib.sha256(bytes(b ^ 0x5C for b in key))
+    )
+
+_inner_template, _outer_template = _hmac_pads(settings.JWT_SECRET.encode())
+
+
+def _sign(signing_input: bytes) -> bytes:
+    # HMAC-SHA256 from the two precomputed states; cheaper than copying an hmac object
+    inner = _inner_template.copy()
+    inner.update(signing_input)
+    outer = _outer_template.copy()
+    outer.update(inner.digest())
+    return _b64url_encode(outer.digest())
+
+def _encode_hs256(payload: dict) -> str:
+    signing_input = _HEADER_B64 + b"." + _b64url_encode(orjson.dumps(payload))
+    return (signing_input + b"." + _sign(signing_input)).decode()
+
+def _decode_hs256(token: str) -> dict:
+    """Verify signature and expiry, raising the same errors as jwt.decode"""
+    try:
+        signing_input, signature = token.encode().rsplit(b".", 1)
+        header_b64, payload_b64 = signing_input.split(b".")
+        header = orjson.loads(_b64url_decode(header_b64))
+        payload = orjson.loads(_b64url_decode(payload_b64))
+    except (ValueError, orjson.JSONDecodeError) as e:
+        raise jwt.DecodeError(str(e))
+
+    if not isinstance(header, dict) or header.get("alg") != "HS256":
+        raise jwt.InvalidAlgorithmError("The specified alg value is not allowed")
+    if not hmac.compare_digest(signature, _sign(signing_input)):
+        raise jwt.InvalidSignatureError("Signature verification failed")
+    if not isinstance(payload, dict):
+        raise jwt.DecodeError("Invalid payload")
+
+    if "exp" in payload:
+        # Like PyJWT, any numeric date is accepted and truncated to whole seconds
+        try:
+            exp = int(payload["exp"])
+        except (TypeError, ValueError):
+            raise jwt.DecodeError("Expiration Time claim (exp) must be an integer")
+        if exp <= time.time():
+            raise jwt.ExpiredSignatureError("Signature has expired")
+    return payload
+
+
+def _prepare_keys():
+    """Parse the configured key once for algorithms signed through PyJWT"""
+    if _USE_FAST_HS256:
+        return None, None
+    signing_key = get_default_algorithms()[settings.JWT_ALGORITHM].prepare_key(settings.JWT_SECRET)
+    # Asymmetric algorithms verify with the public half of the configured private key
+    verify_key = signing_key.public_key() if hasattr(signing_key, "public_key") else signing_key
+    return signing_key, verify_key
+
+_signing_key, _verify_key = _prepare_keys()
+
+
+# Token lifetimes in seconds, so expiry is plain integer math on time.time()
+_ACCESS_SECONDS = settings.JWT_EXPIRATION_HOURS * 3600
+_REFRESH_SECONDS = settings.JWT_REFRESH_EXPIRATION_DAYS * 86400
+
+
 class JWTHandler:
+    @staticmethod
+    def _encode(to_encode: dict) -> str:
+        if _USE_FAST_HS256:
+            return _encode_hs256(to_encode)
+        return jwt.encode(
+            to_encode,
+            _signing_key,
+            algorithm=settings.JWT_ALGORITHM
+        )
+
     @staticmethod
     def create_access_token(data: dict, expires_delta: Optional[timedelta] = None) -> str:
         """Create JWT access token"""
         to_encode = data.copy()
 
         if expires_delta:
-            expire = datetime.utcnow() + expires_delta
+            lifetime = int(expires_delta.total_seconds())
         else:
-            expire = datetime.utcnow() + timedelta(hours=settings.JWT_EXPIRATION_HOURS)
+            lifetime = _ACCESS_SECONDS
 
-        to_encode.update({"exp": expire})
+        to_encode["exp"] = int(time.time()) + lifetime
 
-        encoded_jwt = jwt.encode(
-            to_encode,
-            settings.JWT_SECRET,
-            algorithm=settings.JWT_ALGORITHM
-        )
-
-        return encoded_jwt
+        return JWTHandler._encode(to_encode)
 
     @staticmethod
     def create_refresh_token(data: dict) -> str:
         """Create JWT refresh token (longer expiration)"""
         to_encode = data.copy()
-        expire = datetime.utcnow() + timedelta(days=settings.JWT_REFRESH_EXPIRATION_DAYS)
-        to_encode.update({"exp": expire, "type": "refresh"})
-
-        encoded_jwt = jwt.encode(
-            to_encode,
-            settings.JWT_SECRET,
-            algorithm=settings.JWT_ALGORITHM
-        )
+        to_encode.update({"exp": int(time.time()) + _REFRESH_SECONDS, "type": "refresh"})
 
-        return encoded_jwt
+        return JWTHandler._encode(to_encode)
 
     @staticmethod
     def verify_token(token: str) -> Optional[dict]:
         """Verify and decode JWT token"""
         try:
+            if _USE_FAST_HS256:
+                return _decode_hs256(token)
             payload = jwt.decode(
                 token,
-                settings.JWT_SECRET,
+                _verify_key,
                 algorithms=[settings.JWT_ALGORITHM]
             )
             return payload
@@ -0,0 +1,26 @@
+from typing import Any, Callable, Type, TypeVar
+from fastapi import HTTPException, Request, Response, status
+import msgspec
+
+T = TypeVar("T", bound=msgspec.Struct)
+
+
+def msgspec_body(struct_type: Type[T]) -> Callable:
+    """Build a dependency that decodes the JSON request body into a msgspec Struct"""
+    decoder = msgspec.json.Decoder(struct_type)
+
+    async def decode(request: Request) -> T:
+        try:
+            return decoder.decode(await request.body())
+        except (msgspec.ValidationError, msgspec.DecodeError) as e:
+            raise HTTPException(
+                status_code=status.HTTP_422_UNPROCESSABLE_ENTITY,
+                detail=str(e)
+            )
+
+    return decode
+
+
+def msgspec_response(content: Any) -> Response:
+    """Encode content with msgspec, skipping FastAPI's jsonable_encoder pass"""
+    return Response(content=msgspec.json.encode(content), media_type="application/json")
@@ -0,0 +1,285 @@
+import importlib
+import os
+
+import faiss
+import numpy as np
+import orjson
+import pytest
+
+DIM = 384
+
+
+@pytest.fixture
+def fs(tmp_path, monkeypatch):
+    """faiss_service module over an empty data directory in tmp_path"""
+    # Data paths are relative to the working directory
+    monkeypatch.chdir(tmp_path)
+    module = importlib.import_module("app.services.faiss_service")
+    os.makedirs(module.FAISS_DATA_DIR, exist_ok=True)
+    _reset(module.FAISSService)
+    yield module
+    _stop(module.FAISSService)
+    _reset(module.FAISSService)
+
+
+def _stop(service):
+    thread = service._maintenance_thread
+    if thread is not None:
+        thread.join(10)
+    if service._db is not None:
+        service._db.close()
+
+
+def _reset(service):
+    service._index = None
+    service._db = None
+    service._vectors = None
+    service._set_positions({})
+    service._index_mtime = None
+    service._dirty = False
+    service._pending_writes = 0
+    service._maintenance_thread = None
+    service._index_generation = 0
+
+
+def _restart(fs):
+    """Drop all in-memory state without flushing, as a killed process would"""
+    _stop(fs.FAISSService)
+    _reset(fs.FAISSService)
+    fs.FAISSService.initialize()
+
+
+def _wait_for_maintenance(fs):
+    thread = fs.FAISSService._maintenance_thread
+    if thread is not None:
+        thread.join(10)
+
+
+def _vectors(count, seed=0):
+    return np.random.default_rng(seed).standard_normal((count, DIM)).astype(np.float32)
+
+
+def _add(fs, vectors, prefix="r", start=0):
+    assert fs.FAISSService.add_resumes_batch([
+        (f"{prefix}{start + i}", f"text {start + i}", vector, {"n": start + i})
+        for i, vector in enumerate(vectors)
+    ])
+
+
+def _top_hit(fs, vector):
+    return fs.FAISSService.search_resumes(vector, 1)["ids"][0]
+
+
+def _assert_all_found(fs, vectors, ids):
+    assert [_top_hit(fs, vectors[i]) for i in ids] == [f"r{i}" for i in ids]
+
+
+def test_add_search_get(fs):
+    vectors = _vectors(20)
+    fs.FAISSService.initialize()
+    _add(fs, vectors)
+
+    results = fs.FAISSService.search_resumes(vectors[7], 3)
+
+    assert results["ids"][0] == "r7"
+    assert results["documents"][0] == "text 7"
+    assert results["metadatas"][0] == {"n": 7}
+    assert results["distances"][0] == pytest.approx(0.0, abs=1e-5)
+    assert len(results["ids"]) == 3
+    assert fs.FAISSService.get_resume("r3") == {"id": "r3", "document": "text 3", "metadata": {"n": 3}}
+
+
+def test_search_empty_index(fs):
+    fs.FAISSService.initialize()
+
+    assert fs.FAISSService.search_resumes(_vectors(1)[0], 5) == {
+        "ids": [], "distances": [], "documents": [], "metadatas": []
+    }
+
+
+def test_delete_hides_resume(fs, monkeypatch):
+    # Keep the deleted vector in the index, so search has to skip it
+    monkeypatch.setattr(fs, "COMPACT_FRACTION", 1.0)
+    vectors = _vectors(10)
+    fs.FAISSService.initialize()
+    _add(fs, vectors)
+
+    assert fs.FAISSService.delete_resume("r4")
+    assert not fs.FAISSService.delete_resume("r4")
+
+    results = fs.FAISSService.search_resumes(vectors[4], 10)
+    assert "r4" not in results["ids"]
+    assert len(results["ids"]) == 9
+    assert fs.FAISSService.get_resume("r4") is None
+    assert fs.FAISSService._index.ntotal == 10
+
+
+def test_readd_replaces_vector(fs, monkeypatch):
+    monkeypatch.setattr(fs, "COMPACT_FRACTION", 1.0)
+    vectors = _vectors(10)
+    replacement = _vectors(1, seed=1)[0]
+    fs.FAISSService.initialize()
+    _add(fs, vectors)
+
+    assert fs.FAISSService.add_resume("r2", "new text", replacement, {"n": "new"})
+
+    assert _top_hit(fs, replacement) == "r2"
+    assert fs.FAISSService.search_resumes(vectors[2], 10)["ids"].count("r2") == 1
+    assert fs.FAISSService.get_resume("r2")["document"] == "new text"
+    assert sorted(fs.FAISSService.list_all_resumes()) == sorted(f"r{i}" for i in range(10))
+
+
+def test_unflushed_adds_are_replayed(fs):
+    vectors = _vectors(30)
+    fs.FAISSService.initialize()
+    _add(fs, vectors[:20])
+    fs.FAISSService.flush()
+    # Below FLUSH_EVERY_N_WRITES, so these exist only in metadata.db and vectors.f16
+    _add(fs, vectors[20:], start=20)
+
+    _restart(fs)
+
+    assert fs.FAISSService._index.ntotal == 30
+    _assert_all_found(fs, vectors, range(30))
+
+
+def test_compaction_remaps_positions(fs):
+    vectors = _vectors(100)
+    fs.FAISSService.initialize()
+    _add(fs, vectors)
+
+    # Past COMPACT_FRACTION, so the background rebuild drops the deleted vectors
+    for i in range(0, 100, 5):
+        fs.FAISSService.delete_resume(f"r{i}")
+    _wait_for_maintenance(fs)
+
+    remaining = [i for i in range(100) if i % 5]
+    assert fs.FAISSService._index.ntotal == len(remaining)
+    assert sorted(fs.FAISSService._index_to_id) == list(range(len(remaining)))
+    _assert_all_found(fs, vectors, remaining)
+
+    _restart(fs)
+
+    assert fs.FAISSService._index.ntotal == len(remaining)
+    _assert_all_found(fs, vectors, remaining)
+
+
+def test_swap_keeps_adds_made_during_rebuild(fs, monkeypatch):
+    monkeypatch.setattr(fs, "COMPACT_FRACTION", 1.0)
+    vectors = _vectors(40)
+    service = fs.FAISSService
+    service.initialize()
+    _add(fs, vectors[:30])
+    for i in range(10):
+        service.delete_resume(f"r{i}")
+
+    # Snapshot and build as the maintenance thread does, with adds landing in between
+    total = service._index.ntotal
+    live = sorted(service._index_to_id)
+    snapshot = np.asarray(service._vectors[live], dtype=np.float32)
+    new_index = service._build_index(snapshot, 0)
+    _add(fs, vectors[30:], start=30)
+    with service._index_lock.write():
+        service._swap_in(new_index, live, total, snapshot)
+
+    remaining = range(10, 40)
+    assert service._index.ntotal == 30
+    _assert_all_found(fs, vectors, remaining)
+
+    _restart(fs)
+
+    _assert_all_found(fs, vectors, remaining)
+
+
+def test_tier_upgrade_runs_in_background(fs, monkeypatch):
+    monkeypatch.setattr(fs, "TIER_THRESHOLDS", (0, 64, 10 ** 9))
+    vectors = _vectors(80)
+    fs.FAISSService.initialize()
+    _add(fs, vectors)
+    _wait_for_maintenance(fs)
+
+    assert isinstance(fs.FAISSService._index, faiss.IndexHNSWSQ)
+    _assert_all_found(fs, vectors, range(80))
+
+    _restart(fs)
+
+    assert isinstance(fs.FAISSService._index, faiss.IndexHNSWSQ)
+
+
+def test_interrupted_swap_is_rolled_back(fs, monkeypatch):
+    vectors = _vectors(50)
+    fs.FAISSService.initialize()
+    _add(fs, vectors)
+    fs.FAISSService.flush()
+
+    # Fail while writing the swap index, before the new positions commit
+    write_index = fs.faiss.write_index
+
+    def failing_write(index, path):
+        if path.endswith(".swap"):
+            raise OSError("disk full")
+        write_index(index, path)
+
+    monkeypatch.setattr(fs.faiss, "write_index", failing_write)
+    for i in range(10):
+        fs.FAISSService.delete_resume(f"r{i}")
+    _wait_for_maintenance(fs)
+    monkeypatch.setattr(fs.faiss, "write_index", write_index)
+    assert os.path.exists(fs.VECTORS_SWAP_PATH)
+
+    _restart(fs)
+
+    assert not os.path.exists(fs.INDEX_SWAP_PATH)
+    assert not os.path.exists(fs.VECTORS_SWAP_PATH)
+    _assert_all_found(fs, vectors, range(10, 50))
+
+
+def test_committed_swap_is_rolled_forward(fs, monkeypatch):
+    vectors = _vectors(50)
+    fs.FAISSService.initialize()
+    _add(fs, vectors)
+    fs.FAISSService.flush()
+
+    # Fail moving the swap index into place, after the new positions commit
+    replace = os.replace
+
+    def failing_replace(src, dst):
+        if src == fs.INDEX_SWAP_PATH:
+            raise OSError("killed")
+        replace(src, dst)
+
+    monkeypatch.setattr(fs.os, "replace", failing_replace)
+    for i in range(10):
+        fs.FAISSService.delete_resume(f"r{i}")
+    _wait_for_maintenance(fs)
+    monkeypatch.setattr(fs.os, "replace", replace)
+    assert os.path.exists(fs.INDEX_SWAP_PATH)
+
+    _restart(fs)
+
+    assert not os.path.exists(fs.INDEX_SWAP_PATH)
+    assert fs.FAISSService._index.ntotal == 40
+    _assert_all_found(fs, vectors, range(10, 50))
+
+
+def test_imports_legacy_flat_index_and_metadata_json(fs):
+    vectors = _vectors(20)
+    legacy = faiss.IndexFlatL2(DIM)
+    legacy.add(vectors)
+    faiss.write_index(legacy, fs.FAISS_INDEX_PATH)
+    with open(fs.LEGACY_METADATA_PATH, "wb") as f:
+        f.write(orjson.dumps({
+            "metadata": {f"r{i}": {"text": f"text {i}", "metadata": {"n": i}} for i in range(20)},
+            "id_to_index": {f"r{i}": i for i in range(20)}
+        }))
+
+    fs.FAISSService.initialize()
+
+    assert isinstance(faiss.read_index(fs.FAISS_INDEX_PATH), faiss.IndexHNSWFlat)
+    assert not os.path.exists(fs.LEGACY_METADATA_PATH)
+    assert fs.FAISSService.get_resume("r5") == {"id": "r5", "document": "text 5", "metadata": {"n": 5}}
+    _assert_all_found(fs, vectors, range(20))
+
+    _restart(fs)
+
+    _assert_all_found(fs, vectors, range(20))
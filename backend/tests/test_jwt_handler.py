@@ -0,0 +1,126 @@
+import base64
+import time
+from datetime import timedelta
+
+import jwt
+import pytest
+
+from app.config import settings
+from app.utils.jwt_handler import JWTHandler, _decode_hs256
+
+SECRET = settings.JWT_SECRET
+
+
+def _tamper(token: str) -> str:
+    """Flip the last signature character to another valid base64url one"""
+    return token[:-1] + ("A" if token[-1] != "A" else "B")
+
+
+def test_handler_token_verifies_with_pyjwt():
+    token = JWTHandler.create_access_token({"sub": "user-1", "email": "a@b.co"})
+
+    payload = jwt.decode(token, SECRET, algorithms=["HS256"])
+
+    assert payload["sub"] == "user-1"
+    assert payload["email"] == "a@b.co"
+    assert jwt.get_unverified_header(token) == {"alg": "HS256", "typ": "JWT"}
+
+
+def test_pyjwt_token_verifies_with_handler():
+    exp = int(time.time()) + 60
+    token = jwt.encode({"sub": "user-1", "type": "refresh", "exp": exp}, SECRET, algorithm="HS256")
+
+    assert JWTHandler.verify_token(token) == {"sub": "user-1", "type": "refresh", "exp": exp}
+
+
+def test_create_tokens_round_trip():
+    tokens = JWTHandler.create_tokens("user-1", "a@b.co")
+
+    access = JWTHandler.verify_token(tokens["access_token"])
+    refresh = JWTHandler.verify_token(tokens["refresh_token"])
+
+    assert access["sub"] == refresh["sub"] == "user-1"
+    assert "type" not in access
+    assert refresh["type"] == "refresh"
+    assert refresh["exp"] > access["exp"]
+
+
+def test_float_exp_is_accepted_like_pyjwt():
+    token = jwt.encode({"sub": "user-1", "exp": time.time() + 60.5}, SECRET, algorithm="HS256")
+
+    assert JWTHandler.verify_token(token)["sub"] == "user-1"
+
+
+def test_non_numeric_exp_is_rejected():
+    token = jwt.encode({"sub": "user-1", "exp": "soon"}, SECRET, algorithm="HS256")
+
+    with pytest.raises(jwt.DecodeError):
+        _decode_hs256(token)
+    assert JWTHandler.verify_token(token) is None
+
+
+@pytest.mark.parametrize("exp", [int(time.time()) - 10, time.time() - 10.5])
+def test_expired_token(exp):
+    token = jwt.encode({"sub": "user-1", "exp": exp}, SECRET, algorithm="HS256")
+
+    with pytest.raises(jwt.ExpiredSignatureError):
+        _decode_hs256(token)
+    assert JWTHandler.verify_token(token) is None
+
+
+def test_expired_handler_token_rejected_by_pyjwt():
+    token = JWTHandler.create_access_token({"sub": "user-1"}, expires_delta=timedelta(seconds=-10))
+
+    with pytest.raises(jwt.ExpiredSignatureError):
+        jwt.decode(token, SECRET, algorithms=["HS256"])
+
+
+def test_tampered_signature():
+    token = _tamper(JWTHandler.create_access_token({"sub": "user-1"}))
+
+    with pytest.raises(jwt.InvalidSignatureError):
+        _decode_hs256(token)
+    assert JWTHandler.verify_token(token) is None
+
+
+def test_tampered_payload():
+    token = JWTHandler.create_access_token({"sub": "user-1"})
+    header, _, signature = token.split(".")
+    forged = base64.urlsafe_b64encode(b'{"sub":"admin"}').rstrip(b"=").decode()
+
+    assert JWTHandler.verify_token(f"{header}.{forged}.{signature}") is None
+
+
+def test_wrong_secret():
+    token = jwt.encode({"sub": "user-1"}, SECRET + "x", algorithm="HS256")
+
+    with pytest.raises(jwt.InvalidSignatureError):
+        _decode_hs256(token)
+
+
+@pytest.mark.parametrize("algorithm", ["HS384", "HS512", "none"])
+def test_wrong_algorithm(algorithm):
+    key = None if algorithm == "none" else SECRET
+    token = jwt.encode({"sub": "user-1"}, key, algorithm=algorithm)
+
+    with pytest.raises(jwt.InvalidAlgorithmError):
+        _decode_hs256(token)
+    assert JWTHandler.verify_token(token) is None
+
+
+@pytest.mark.parametrize(
+    "token",
+    [
+        "",
+        "not-a-token",
+        "a.b",
+        "a.b.c.d",
+        "!!!.???.###",
+        "e30.e30.",  # empty JSON objects, no signature
+        "W10.W10.sig",  # JSON arrays instead of objects
+    ],
+)
+def test_malformed_token(token):
+    with pytest.raises(jwt.InvalidTokenError):
+        _decode_hs256(token)
+    assert JWTHandler.verify_token(token) is None
@@ -0,0 +1,66 @@
+import asyncio
+
+import pytest
+
+from app.utils.micro_batcher import MicroBatcher
+
+
+def _recording_handler(calls):
+    async def handler(items):
+        calls.append(list(items))
+        return [item * 2 for item in items]
+    return handler
+
+
+@pytest.mark.asyncio
+async def test_concurrent_submits_share_one_call():
+    calls = []
+    batcher = MicroBatcher(_recording_handler(calls), max_batch=8, timeout=0.05)
+
+    results = await asyncio.gather(*(batcher.submit(i) for i in range(5)))
+    await batcher.stop()
+
+    assert results == [0, 2, 4, 6, 8]
+    assert calls == [[0, 1, 2, 3, 4]]
+
+
+@pytest.mark.asyncio
+async def test_batches_are_capped_at_max_batch():
+    calls = []
+    batcher = MicroBatcher(_recording_handler(calls), max_batch=3, timeout=0.05)
+
+    results = await asyncio.gather(*(batcher.submit(i) for i in range(7)))
+    await batcher.stop()
+
+    assert results == [i * 2 for i in range(7)]
+    assert [len(call) for call in calls] == [3, 3, 1]
+
+
+@pytest.mark.asyncio
+async def test_handler_error_fails_the_whole_batch_only():
+    calls = []
+
+    async def handler(items):
+        calls.append(list(items))
+        if len(calls) == 1:
+            raise ValueError("boom")
+        return items
+
+    batcher = MicroBatcher(handler, max_batch=8, timeout=0.01)
+
+    failed = await asyncio.gather(batcher.submit(1), batcher.submit(2), return_exceptions=True)
+    assert all(isinstance(result, ValueError) for result in failed)
+
+    # The consumer keeps running after a failed batch
+    assert await batcher.submit(3) == 3
+    await batcher.stop()
+
+
+@pytest.mark.asyncio
+async def test_restarts_after_stop():
+    batcher = MicroBatcher(_recording_handler([]), max_batch=4, timeout=0.01)
+
+    assert await batcher.submit(1) == 2
+    await batcher.stop()
+    assert await batcher.submit(2) == 4
+    await batcher.stop()
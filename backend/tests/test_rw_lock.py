@@ -0,0 +1,91 @@
+import threading
+import time
+
+from app.utils.rw_lock import ReadWriteLock
+
+
+def _start(target):
+    thread = threading.Thread(target=target, daemon=True)
+    thread.start()
+    return thread
+
+
+def test_readers_share_the_lock():
+    lock = ReadWriteLock()
+    both_inside = threading.Barrier(2, timeout=2)
+
+    def reader():
+        with lock.read():
+            both_inside.wait()
+
+    threads = [_start(reader) for _ in range(2)]
+    for thread in threads:
+        thread.join(2)
+
+    assert not both_inside.broken
+
+
+def test_writer_excludes_readers():
+    lock = ReadWriteLock()
+    events = []
+
+    def reader():
+        with lock.read():
+            events.append("read")
+
+    with lock.write():
+        reader_thread = _start(reader)
+        time.sleep(0.05)
+        events.append("write done")
+    reader_thread.join(2)
+
+    assert events == ["write done", "read"]
+
+
+def test_waiting_writer_blocks_new_readers():
+    lock = ReadWriteLock()
+    events = []
+    lock.acquire_read()
+
+    def writer():
+        with lock.write():
+            events.append("write")
+
+    def late_reader():
+        with lock.read():
+            events.append("read")
+
+    writer_thread = _start(writer)
+    time.sleep(0.05)
+    reader_thread = _start(late_reader)
+    time.sleep(0.05)
+    assert events == []
+
+    lock.release_read()
+    writer_thread.join(2)
+    reader_thread.join(2)
+
+    assert events == ["write", "read"]
+
+
+def test_reentry():
+    lock = ReadWriteLock()
+
+    with lock.write():
+        with lock.write():
+            with lock.read():
+                pass
+
+    with lock.read():
+        with lock.read():
+            pass
+
+    # Fully released: another thread can write
+    acquired = []
+
+    def writer():
+        with lock.write():
+            acquired.append(True)
+
+    _start(writer).join(2)
+    assert acquired == [True]